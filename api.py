@@ -0,0 +1,231 @@
+"""
+Headless JSON API over the same shared Dataset as the Streamlit app, for embedding in other tools (ticketing).
+
+    GET /drivers/{driver_id}              rank, tier, drivers_score, strengths / focus / at-median per segment
+    GET /search?q=novak&limit=20          same matching as the search box (typo-tolerant fallback included)
+    GET /segments/{segment}/benchmarks    P25 / P50 / P75 of drivers_score and every metric in the segment
+    GET /health                           data version and row count
+
+Every answer comes from indexes built once per data version (DriverIndex, SearchIndex, InsightTable), so no request
+touches the workbook; encoded answers are also kept in a small LRU per data version. Responses carry ETag = data version; a request with a matching If-None-Match gets 304. The
+background watcher swaps in new data exactly like in the app. With SCORECARD_API_TOKEN set, requests must send
+"Authorization: Bearer <token>".
+
+    python api.py --host 127.0.0.1 --port 8502
+"""
+
+from __future__ import annotations
+
+import argparse
+import hmac
+import json
+import logging
+import os
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+import app
+
+logger = logging.getLogger("driver_score.api")
+
+API_TOKEN = os.environ.get("SCORECARD_API_TOKEN")
+SEARCH_LIMIT = 20
+SEARCH_LIMIT_MAX = 200
+# Significant digits of floats in responses (see _num)
+FLOAT_DIGITS = 6
+# Encoded responses kept per (data version, path); entries of an older version age out
+RESPONSE_CACHE_SIZE = 4096
+
+
+def _num(v: object) -> float | int | None:
+    """JSON-safe number: numpy scalars -> Python, NaN -> None. Floats are rounded to FLOAT_DIGITS significant
+    digits, more than the workbook stores, so arithmetic noise (a P50 of 3.0700000000000003, a delta of
+    0.45900000000000007) does not reach the client."""
+    if v is None:
+        return None
+    if isinstance(v, (float, np.floating)):
+        return None if np.isnan(v) else float(f"{float(v):.{FLOAT_DIGITS}g}")
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def _json_default(v: object) -> object:
+    return v.item() if isinstance(v, np.generic) else str(v)
+
+
+def _insight(item: tuple[str, float, dict]) -> dict:
+    name, value, d = item
+    return {
+        "metric": name,
+        "value": _num(value),
+        "p50": _num(d.get("p50")),
+        "p75": _num(d.get("p75")),
+        "delta_to_median": _num(d.get("delta_to_median")),
+        "recommendation": d.get("recommendation", ""),
+    }
+
+
+def driver_payload(ds: app.Dataset, pos: int) -> dict:
+    """One driver_key (driver in one segment): the scorecard data without the presentation."""
+    row = ds.frame.iloc[pos]
+    strengths, focus, at_median = ds.insights.insights_at(pos)
+    tier, label = ds.drivers.eligibility(pos)
+    return {
+        "driver_key": ds.drivers.keys[pos],
+        "driver_id": app._cell_str(row.get("driver_id")),
+        "full_name": app._cell_str(row.get("full_name")),
+        "segment": app._cell_str(row.get("segment")),
+        "rank": int(ds.drivers.ranks[pos]),
+        "total": int(ds.drivers.totals[pos]),
+        "pct_better": int(ds.drivers.pct_better[pos]),
+        "tier": tier,
+        "tier_label": label,
+        "drivers_score": _num(row.get("drivers_score")),
+        "metrics": {c: _num(row.get(c)) for c in ds.metric_cols},
+        "strengths": [_insight(i) for i in strengths],
+        "focus": [_insight(i) for i in focus],
+        "at_median": [_insight(i) for i in at_median],
+    }
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def handle(ds: app.Dataset, path: str, query: dict[str, list[str]]) -> dict:
+    """Route one GET to its JSON body (without the version envelope). Raises ApiError for 4xx."""
+    parts = [unquote(p) for p in path.strip("/").split("/") if p]
+    if parts == ["health"]:
+        return {"rows": len(ds.frame), "built_at": ds.built_at}
+    if len(parts) == 2 and parts[0] == "drivers":
+        positions = ds.search.exact_id(parts[1])
+        if len(positions) == 0:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"driver_id {parts[1]!r} not found")
+        return {"driver_id": parts[1], "results": [driver_payload(ds, int(p)) for p in positions]}
+    if parts == ["search"]:
+        q = (query.get("q") or [""])[0].strip()
+        if not q:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "missing query parameter q")
+        try:
+            limit = int((query.get("limit") or [SEARCH_LIMIT])[0])
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "limit must be an integer") from None
+        if limit < 1:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "limit must be at least 1")
+        limit = min(limit, SEARCH_LIMIT_MAX)
+        positions = ds.search.search(q)
+        fuzzy = len(positions) == 0
+        if fuzzy:
+            positions = ds.search.fuzzy(q)
+        page = np.asarray(positions[:limit], dtype=np.intp)
+        frame = ds.frame
+        columns = {c: frame[c].take(page).tolist() for c in ("driver_id", "full_name", "segment")}
+        results = [
+            {
+                "driver_key": ds.drivers.keys[p],
+                "driver_id": app._cell_str(columns["driver_id"][i]),
+                "full_name": app._cell_str(columns["full_name"][i]),
+                "segment": app._cell_str(columns["segment"][i]),
+                "rank": int(ds.drivers.ranks[p]),
+                "tier": str(ds.drivers.tiers[p]),
+            }
+            for i, p in enumerate(page.tolist())
+        ]
+        return {"q": q, "fuzzy": fuzzy, "count": int(len(positions)), "results": results}
+    if len(parts) == 3 and parts[0] == "segments" and parts[2] == "benchmarks":
+        bench = ds.benchmarks.get(parts[1])
+        if bench is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"segment {parts[1]!r} not found; known: {sorted(ds.benchmarks)}")
+        return {
+            "segment": parts[1],
+            "drivers": int(ds.drivers.segment_sizes.get(parts[1], 0)),
+            "benchmarks": {col: {k: _num(v) for k, v in b.items()} for col, b in bench.items()},
+        }
+    raise ApiError(HTTPStatus.NOT_FOUND, "unknown endpoint")
+
+
+def _encode(body: dict) -> bytes:
+    return json.dumps(body, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    store: app.DatasetStore  # set by make_server()
+    cache: app.LRUCache  # encoded responses per (data version, path)
+    server_version = "DriverScorecardAPI/1"
+    protocol_version = "HTTP/1.1"  # keep-alive; every response sets Content-Length
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid the 40 ms delayed-ACK stall
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+        if API_TOKEN and not hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {API_TOKEN}"):
+            return self._send(HTTPStatus.UNAUTHORIZED, {"error": "missing or wrong API token"})
+        ds, error_hint = self.store.get()
+        if ds is None:
+            return self._send(HTTPStatus.SERVICE_UNAVAILABLE, {"error": error_hint or "no data loaded"})
+        etag = f'"{ds.version[:32]}"'
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            return self._send(HTTPStatus.NOT_MODIFIED, None, etag)
+        key = (ds.version, self.path)
+        hit = self.cache.get(key)
+        if hit is None:
+            url = urlsplit(self.path)
+            try:
+                hit = HTTPStatus.OK, _encode({"version": ds.version, **handle(ds, url.path, parse_qs(url.query))})
+            except ApiError as e:
+                hit = e.status, _encode({"error": str(e), "version": ds.version})
+            self.cache.put(key, hit)
+        self._send(hit[0], hit[1], etag)
+
+    def _send(self, status: HTTPStatus, body: dict | bytes | None, etag: str | None = None) -> None:
+        data = _encode(body) if isinstance(body, dict) else body or b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002
+        logger.debug("%s " + format, self.address_string(), *args)
+
+
+def make_server(host: str, port: int, store: app.DatasetStore | None = None) -> ThreadingHTTPServer:
+    """HTTP server over store (default: a new DatasetStore, loaded and watched)."""
+    if store is None:
+        store = app.DatasetStore()
+        store.refresh()
+        store.start_watcher()
+    handler = type("Handler", (ApiHandler,), {"store": store, "cache": app.LRUCache(RESPONSE_CACHE_SIZE)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    server = make_server(args.host, args.port)
+    ds, error_hint = server.RequestHandlerClass.store.get()
+    if ds is None:
+        logger.warning("no data yet (%s); answering 503 until the watcher loads it", error_hint)
+    logger.info("serving on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.RequestHandlerClass.store.stop_watcher()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,24 +5,83 @@ Search courier by name or driver_id, see segment, rank, metrics, benchmarks, and
 
 from __future__ import annotations
 
+import hashlib
 import io
+import json
+import logging
+import logging.handlers
 import os
 import re
+import threading
+import time
+import unicodedata
+import uuid
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
 from urllib.request import Request, urlopen
 
+import numpy as np
+import openpyxl
 import pandas as pd
+import pyarrow.parquet as pq
 import streamlit as st
 
+logger = logging.getLogger("driver_score")
+
 # -----------------------------------------------------------------------------
 # Constants
 # -----------------------------------------------------------------------------
 
-EXCEL_PATH = Path(__file__).resolve().parent / "data" / "Priority Booking 02-26 results.xlsx"
+# Local workbook (override via SCORECARD_EXCEL_PATH, e.g. for benchmarks on synthetic data)
+EXCEL_PATH = Path(
+    os.environ.get("SCORECARD_EXCEL_PATH") or Path(__file__).resolve().parent / "data" / "Priority Booking 02-26 results.xlsx"
+)
 SHEET_NAMES = ["OOH", "HD Praha", "HD Brno", "HD Ostrava", "HD Olomouc", "HD HK", "HD Plzen"]
 
+# Parsed, typed snapshots of the workbook keyed by content hash (override via SCORECARD_CACHE_DIR)
+SNAPSHOT_DIR = Path(os.environ.get("SCORECARD_CACHE_DIR") or Path(__file__).resolve().parent / "data" / ".cache")
+# Bump when the normalization in _normalize_frame changes so old snapshots are not reused
+SNAPSHOT_VERSION = 4
+SNAPSHOTS_TO_KEEP = 3
+
+# Remote workbook (EXCEL_URL): seconds a stored copy counts as fresh, seconds to wait after a failed revalidation
+# before trying again, and request timeout
+REMOTE_MAX_AGE = 300
+REMOTE_RETRY_AFTER = 60
+REMOTE_TIMEOUT = 30
+# An xlsx is a zip archive; anything else (a sign-in or error page) is not stored
+XLSX_MAGIC = b"PK\x03\x04"
+
+# Several workbooks (e.g. one per region): JSON list in SCORECARD_SOURCES (or a path to a JSON file) or `sources` in
+# secrets, each {"name", "path" | "url", "segments", "timeout"}. Seconds one source may take (fetch + parse) before
+# its last good copy is used instead, and how many sources load at once.
+SOURCE_TIMEOUT = 60
+SOURCE_WORKERS = 8
+# Last good content version per source, so a failing source falls back to its snapshot even after a restart
+SOURCE_MANIFEST = "sources.json"
+
+# Monthly history: every "Priority Booking MM-YY results.xlsx" next to EXCEL_PATH, stored per month as Parquet
+HISTORY_FILE_PATTERN = re.compile(r"Priority Booking (\d{2})-(\d{2}) results\.xlsx$")
+HISTORY_DIR = SNAPSHOT_DIR / "history"
+
+# Per-rerun stage timings, one JSON object per line (override via SCORECARD_TIMING_LOG); rotated at
+# TIMING_LOG_MAX_BYTES into timings.jsonl.1 .. .N, so it stays bounded on a long-running server
+TIMING_LOG_PATH = Path(os.environ.get("SCORECARD_TIMING_LOG") or SNAPSHOT_DIR / "timings.jsonl")
+TIMING_LOG_MAX_BYTES = 10 * 1024 * 1024
+TIMING_LOG_BACKUPS = 3
+
 # Password for 24/7 internal access (override via SCORECARD_PASSWORD env when deploying)
 APP_PASSWORD = os.environ.get("SCORECARD_PASSWORD", "grid.@nline")
+# Logging in with this password (if set) also shows the diagnostics panel
+ADMIN_PASSWORD = os.environ.get("SCORECARD_ADMIN_PASSWORD")
 
 METRIC_COLUMNS = [
     "Kvalita doručení",
@@ -34,6 +93,16 @@ METRIC_COLUMNS = [
     "Delivery Quality",
 ]
 
+# Compact in-memory layout: repeated strings as categoricals. drivers_score and the metrics stay float64: the
+# insight ranking compares metrics with the segment medians (float32 would reorder near-ties), and a float32 score
+# widened back for display shows as 3.5789999961853027 instead of the workbook's 3.579;
+# LAZY_COLUMNS stay in the Parquet snapshot and are read only on demand (Dataset.lazy_columns)
+CATEGORY_COLUMNS = ["segment", "working_city", "primary_ride_type"]
+LAZY_COLUMNS = ["contact_email"]
+
+# Columns kept per month in the history store
+HISTORY_COLUMNS = ["driver_id", "segment", "rank", "drivers_score"] + METRIC_COLUMNS
+
 RECOMMENDATIONS: dict[str, str] = {
     "Kvalita doručení": "Důsledněji dodržujte standardy doručování (2× telefonát, min. 20 s vyzvánění, pak fyzický pokus) a hlídejte úspěšnost doručení do boxů s rezervovanou schránkou.",
     "Efektivita jízdy": "Zaměřte se na rychlost nakládky i doručení – efektivita roste se zkušeností, pomůže konzistentní tempo a lepší plánování trasy.",
@@ -133,6 +202,8 @@ BRAND_CSS = """
   .insight-focus { background: rgba(248, 113, 113, 0.08); border-left: 4px solid #F87171; }
   .insight-focus .insight-title { color: #F87171; }
   .data-source-caption { font-size: 0.8rem; color: var(--text-tertiary); margin-top: 0.75rem; }
+  .metric-grid { display: grid; grid-template-columns: repeat(3, minmax(0, 1fr)); gap: 0 1rem; }
+  @media (max-width: 640px) { .metric-grid { grid-template-columns: 1fr; } }
 </style>
 """
 
@@ -156,53 +227,488 @@ def _normalize_data_url(url: str) -> str:
     return url
 
 
-def _get_excel_bytes() -> tuple[bytes | None, str | None]:
-    """Load Excel from local file or from private URL (for deploy). Returns (data, error_hint)."""
-    if EXCEL_PATH.exists():
-        return EXCEL_PATH.read_bytes(), None
+_HTML_RESPONSE_HINT = (
+    "Odkaz vrátil prázdnou odpověď nebo HTML. U Google Sheets nastavte „Kdokoli s odkazem může zobrazit“ "
+    "a použijte odkaz na tabulku (export se stáhne automaticky)."
+)
+
+
+class RemoteWorkbook:
+    """Remote workbook with the last good payload and its HTTP validators (ETag / Last-Modified) kept on disk.
+
+    get() serves the stored copy immediately; once it is older than max_age it is revalidated with a
+    conditional request in a background thread. Only the very first fetch (nothing stored yet) blocks.
+    Any failure (timeout, 5xx, HTML instead of xlsx) keeps the last good copy and is not retried for retry_after.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        cache_dir: Path,
+        *,
+        max_age: float = REMOTE_MAX_AGE,
+        retry_after: float = REMOTE_RETRY_AFTER,
+        timeout: float = REMOTE_TIMEOUT,
+    ):
+        self.url = url
+        self.max_age = max_age
+        self.retry_after = retry_after
+        self.timeout = timeout
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        self.body_path = cache_dir / f"remote-{key}.xlsx"
+        self.meta_path = cache_dir / f"remote-{key}.json"
+        self._lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+
+    def _read_meta(self) -> dict:
+        try:
+            return json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _read_body(self) -> bytes | None:
+        try:
+            return self.body_path.read_bytes()
+        except OSError:
+            return None
+
+    def _store(self, body: bytes | None, meta: dict) -> None:
+        self.body_path.parent.mkdir(parents=True, exist_ok=True)
+        if body is not None:
+            tmp = self.body_path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, self.body_path)
+        tmp = self.meta_path.with_suffix(".jtmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+
+    def is_fresh(self) -> bool:
+        """Stored copy younger than max_age, or the last failed revalidation younger than retry_after."""
+        meta, now = self._read_meta(), time.time()
+        return (
+            now - float(meta.get("fetched_at", 0)) < self.max_age
+            or now - float(meta.get("attempted_at", 0)) < self.retry_after
+        )
+
+    def _failed(self, meta: dict, stored: bytes | None, hint: str) -> tuple[bytes | None, str | None]:
+        """Record the failed attempt (so revalidation backs off) and fall back to the stored copy."""
+        if stored is not None:
+            self._store(None, {**meta, "attempted_at": time.time()})
+        return stored, None if stored is not None else hint
+
+    def fetch(self) -> tuple[bytes | None, str | None]:
+        """Conditional GET. Returns (payload, error_hint); on failure the stored copy (if any) with the error."""
+        meta = self._read_meta()
+        stored = self._read_body()
+        headers = {"User-Agent": "Mozilla/5.0 (compatible; Streamlit)"}
+        if stored is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            with urlopen(Request(self.url, headers=headers), timeout=self.timeout) as resp:
+                data = resp.read()
+                etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        except HTTPError as e:
+            if e.code == 304 and stored is not None:
+                self._store(None, {**meta, "fetched_at": time.time()})
+                return stored, None
+            logger.warning("remote workbook fetch failed: HTTP %s", e.code)
+            return self._failed(meta, stored, str(e))
+        except Exception as e:
+            logger.warning("remote workbook fetch failed: %s", e)
+            return self._failed(meta, stored, str(e))
+        if not data.startswith(XLSX_MAGIC):
+            logger.warning("remote workbook fetch returned %d bytes that are not an xlsx", len(data))
+            return self._failed(meta, stored, _HTML_RESPONSE_HINT)
+        self._store(data, {"url": self.url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()})
+        return data, None
+
+    def _revalidate_in_background(self) -> None:
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.fetch, name="excel-revalidate", daemon=True)
+            self._refresh_thread.start()
+
+    def revalidate_if_stale(self) -> None:
+        """Start a background revalidation if the stored copy is older than max_age (no disk read of the body)."""
+        if not self.is_fresh():
+            self._revalidate_in_background()
+
+    def get(self) -> tuple[bytes | None, str | None]:
+        """Stale-while-revalidate read. Returns (data, error_hint)."""
+        stored = self._read_body()
+        if stored is None:
+            return self.fetch()
+        self.revalidate_if_stale()
+        return stored, None
+
+
+_remote_workbooks: dict[str, RemoteWorkbook] = {}
+_remote_workbooks_lock = threading.Lock()
+
+
+def _remote_workbook(url: str) -> RemoteWorkbook:
+    """One RemoteWorkbook per URL per process, so background revalidations are not duplicated."""
+    with _remote_workbooks_lock:
+        if url not in _remote_workbooks:
+            _remote_workbooks[url] = RemoteWorkbook(url, SNAPSHOT_DIR)
+        return _remote_workbooks[url]
+
+
+def _excel_url() -> str | None:
+    """Normalized EXCEL_URL (env) or excel_url (Streamlit secrets), None if not configured."""
     url = os.environ.get("EXCEL_URL")
     if not url and hasattr(st, "secrets"):
         try:
             url = getattr(st.secrets, "excel_url", None) or (st.secrets.get("excel_url") if hasattr(st.secrets, "get") else None)
         except Exception:
             pass
-    if not url:
-        return None, None
-    url = _normalize_data_url(url)
-    try:
-        req = Request(url, headers={"User-Agent": "Mozilla/5.0 (compatible; Streamlit)"})
-        with urlopen(req, timeout=30) as resp:
-            data = resp.read()
-        if not data or (len(data) < 100 and b"<" in data[:200]):
-            return None, "Odkaz vrátil prázdnou odpověď nebo HTML. U Google Sheets nastavte „Kdokoli s odkazem může zobrazit“ a použijte odkaz na tabulku (export se stáhne automaticky)."
-        return data, None
-    except Exception as e:
-        return None, str(e)
+    return _normalize_data_url(url) if url else None
 
 
-@st.cache_data(ttl=300)
-def load_all_data() -> tuple[pd.DataFrame, str | None]:
-    """Load Excel from local path or from EXCEL_URL / secrets (all sheets). Returns (df, error_hint)."""
-    data, error_hint = _get_excel_bytes()
-    if data is None:
-        return pd.DataFrame(), error_hint
-    frames: list[pd.DataFrame] = []
-    for sheet in SHEET_NAMES:
+@dataclass(frozen=True)
+class DataSource:
+    """One results workbook (a local path or a URL) and the segments, i.e. sheets, taken from it."""
+
+    name: str
+    location: str
+    segments: tuple[str, ...] = tuple(SHEET_NAMES)
+    timeout: float = SOURCE_TIMEOUT
+
+    @property
+    def is_url(self) -> bool:
+        return self.location.startswith(("http://", "https://"))
+
+    def fetch(self) -> tuple[bytes | None, str | None]:
+        """Workbook bytes; a URL goes through its RemoteWorkbook (stored copy, revalidated when stale)."""
+        if self.is_url:
+            return _remote_workbook(self.location).get()
+        try:
+            return Path(self.location).read_bytes(), None
+        except OSError as e:
+            return None, str(e)
+
+    def signature(self) -> tuple[str, int, int] | None:
+        """(path, mtime_ns, size) of the local file, or of the stored copy of the remote one (also kicking off its
+        revalidation when stale). None if there is nothing to read yet."""
+        path = Path(self.location)
+        if self.is_url:
+            remote = _remote_workbook(self.location)
+            remote.revalidate_if_stale()
+            path = remote.body_path
+        try:
+            st_ = path.stat()
+        except OSError:
+            return None
+        return str(path), st_.st_mtime_ns, st_.st_size
+
+
+def _configured_sources() -> list[dict] | None:
+    """Raw source entries from SCORECARD_SOURCES (JSON, or a path to a JSON file) or `sources` in Streamlit secrets."""
+    raw = os.environ.get("SCORECARD_SOURCES")
+    if raw:
+        text = raw if raw.lstrip().startswith("[") else Path(raw).read_text(encoding="utf-8")
+        return json.loads(text)
+    if hasattr(st, "secrets"):
         try:
-            df = pd.read_excel(io.BytesIO(data), sheet_name=sheet)
+            entries = st.secrets.get("sources") if hasattr(st.secrets, "get") else None
         except Exception:
-            continue
-        df = df.copy()
-        df["segment"] = sheet
-        frames.append(df)
+            entries = None
+        if entries:
+            return [dict(e) for e in entries]
+    return None
+
+
+def data_sources() -> list[DataSource]:
+    """Configured sources, else the single workbook: EXCEL_PATH if it exists, otherwise EXCEL_URL / excel_url.
+    Empty if nothing is configured. Raises ValueError on an invalid configuration."""
+    try:
+        entries = _configured_sources()
+    except (OSError, ValueError) as e:
+        raise ValueError(f"SCORECARD_SOURCES: {e}") from e
+    if entries is None:
+        if EXCEL_PATH.exists():
+            return [DataSource("default", str(EXCEL_PATH))]
+        url = _excel_url()
+        return [DataSource("default", url)] if url else []
+    base = Path(__file__).resolve().parent
+    sources: list[DataSource] = []
+    claimed: dict[str, str] = {}
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict) or not (entry.get("path") or entry.get("url")):
+            raise ValueError(f"zdroj č. {i} potřebuje 'path' nebo 'url'")
+        if entry.get("url"):
+            location = _normalize_data_url(str(entry["url"]))
+        else:
+            path = Path(str(entry["path"])).expanduser()
+            location = str(path if path.is_absolute() else base / path)
+        name = str(entry.get("name") or Path(urlsplit(location).path).stem or f"source-{i}")
+        segments = entry.get("segments") or SHEET_NAMES
+        segments = (segments,) if isinstance(segments, str) else tuple(str(s) for s in segments)
+        if any(s.name == name for s in sources):
+            raise ValueError(f"název zdroje {name!r} je použit dvakrát")
+        for seg in segments:
+            if seg in claimed:
+                raise ValueError(f"segment {seg!r} je ve zdroji {claimed[seg]!r} i {name!r}")
+            claimed[seg] = name
+        sources.append(DataSource(name, location, segments, float(entry.get("timeout") or SOURCE_TIMEOUT)))
+    return sources
+
+
+def _source_signature(sources: list[DataSource]) -> tuple | None:
+    """Cheap change check of all sources (see DataSource.signature); None if there is no source yet."""
+    return tuple(s.signature() for s in sources) or None
+
+
+@dataclass(frozen=True)
+class SheetLoadStats:
+    """Timing and size of one sheet read during workbook ingestion."""
+
+    sheet: str
+    rows: int
+    seconds: float
+
+
+def _read_workbook(
+    data: bytes, sheets: tuple[str, ...] | list[str] = tuple(SHEET_NAMES)
+) -> tuple[pd.DataFrame, list[SheetLoadStats]]:
+    """Open the workbook once (read-only) and stream every expected sheet into one frame with a `segment` column.
+    Returns (df, per-sheet stats); df is empty if none of sheets is present."""
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    frames: list[pd.DataFrame] = []
+    stats: list[SheetLoadStats] = []
+    try:
+        for sheet in sheets:
+            if sheet not in wb.sheetnames:
+                continue
+            t0 = time.perf_counter()
+            rows = wb[sheet].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+            records = [r for r in rows if any(v is not None for v in r)]
+            df = pd.DataFrame.from_records(records, columns=columns) if records else pd.DataFrame(columns=columns)
+            df["segment"] = sheet
+            frames.append(df)
+            stats.append(SheetLoadStats(sheet, len(df), time.perf_counter() - t0))
+    finally:
+        wb.close()
     if not frames:
-        return pd.DataFrame(), "Excel nemá očekávané listy (OOH, HD Praha, …) nebo soubor není platný xlsx."
-    out = pd.concat(frames, ignore_index=True)
+        return pd.DataFrame(), stats
+    return pd.concat(frames, ignore_index=True), stats
+
+
+def _normalize_frame(out: pd.DataFrame) -> pd.DataFrame:
+    """Coerce rank, drivers_score and metric columns to numbers (invalid cells -> NaN) and compact the layout:
+    CATEGORY_COLUMNS -> category, rank -> int32 when it has no gaps."""
     numeric_cols = ["rank", "drivers_score"] + [c for c in METRIC_COLUMNS if c in out.columns]
     for col in numeric_cols:
         if col in out.columns:
             out[col] = pd.to_numeric(out[col], errors="coerce")
-    return out, None
+    for col in CATEGORY_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].astype("category")
+    if "rank" in out.columns:
+        rank = out["rank"]
+        out["rank"] = rank.astype(np.int32) if rank.notna().all() and (rank % 1 == 0).all() else rank.astype(np.float32)
+    return out
+
+
+def memory_report(df: pd.DataFrame) -> dict[str, int]:
+    """Deep memory usage in bytes per column plus "total"."""
+    usage = df.memory_usage(deep=True, index=False)
+    return {**{str(k): int(v) for k, v in usage.items()}, "total": int(usage.sum())}
+
+
+def data_version(data: bytes, sheets: tuple[str, ...] | list[str] = tuple(SHEET_NAMES)) -> str:
+    """Content hash of the source workbook (and of the sheets taken from it, if not all of SHEET_NAMES);
+    identifies one data version."""
+    version = hashlib.sha256(data).hexdigest()
+    if list(sheets) == SHEET_NAMES:
+        return version
+    return hashlib.sha256(f"{version}:{','.join(sheets)}".encode("utf-8")).hexdigest()
+
+
+def _snapshot_path(version: str) -> Path:
+    return SNAPSHOT_DIR / f"{version[:32]}-v{SNAPSHOT_VERSION}.parquet"
+
+
+def _read_snapshot(version: str, columns: list[str] | None = None) -> pd.DataFrame | None:
+    """Snapshot of this version without LAZY_COLUMNS, or only the given columns. None if missing/unreadable."""
+    path = _snapshot_path(version)
+    if not path.exists():
+        return None
+    try:
+        if columns is None:
+            columns = [c for c in pq.read_schema(path).names if c not in LAZY_COLUMNS]
+        return pd.read_parquet(path, columns=columns)
+    except Exception as e:
+        logger.warning("snapshot %s unreadable, re-parsing: %s", path.name, e)
+        return None
+
+
+def _write_snapshot(version: str, df: pd.DataFrame, keep: int = SNAPSHOTS_TO_KEEP) -> None:
+    """Write the normalized frame (LAZY_COLUMNS included) atomically and drop all but the newest keep snapshots."""
+    path = _snapshot_path(version)
+    tmp = path.with_suffix(".tmp")
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning("could not write snapshot %s: %s", path.name, e)
+        tmp.unlink(missing_ok=True)
+        return
+    old = sorted(SNAPSHOT_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime, reverse=True)[keep:]
+    for p in old:
+        p.unlink(missing_ok=True)
+
+
+def _parse_workbook(
+    data: bytes, sheets: tuple[str, ...] | list[str] = tuple(SHEET_NAMES), keep: int = SNAPSHOTS_TO_KEEP
+) -> pd.DataFrame:
+    """Parse and normalize the given sheets of the workbook, going through the content-hashed snapshot cache. Empty df
+    if invalid. LAZY_COLUMNS are left out (see read_lazy_columns). The content hash is stored in
+    df.attrs["data_version"], "snapshot" or "xlsx" in df.attrs["source"]."""
+    version = data_version(data, sheets)
+    t0 = time.perf_counter()
+    cached = _read_snapshot(version)
+    if cached is not None:
+        logger.info("snapshot %s loaded in %.3f s", version[:12], time.perf_counter() - t0)
+        cached.attrs["data_version"] = version
+        cached.attrs["source"] = "snapshot"
+        return cached
+    try:
+        out, stats = _read_workbook(data, sheets)
+    except Exception:
+        out, stats = pd.DataFrame(), []
+    for s in stats:
+        logger.info("sheet %r: %d rows in %.3f s", s.sheet, s.rows, s.seconds)
+    logger.info("workbook parsed in %.3f s (%d sheets)", time.perf_counter() - t0, len(stats))
+    if out.empty:
+        return out
+    before = memory_report(out)["total"]
+    out = _normalize_frame(out)
+    _write_snapshot(version, out, keep)
+    out = out.drop(columns=[c for c in LAZY_COLUMNS if c in out.columns])
+    logger.info("frame memory %.1f MB -> %.1f MB after compaction", before / 1e6, memory_report(out)["total"] / 1e6)
+    out.attrs["data_version"] = version
+    out.attrs["source"] = "xlsx"
+    return out
+
+
+def read_lazy_columns(version: str, columns: list[str] = LAZY_COLUMNS, parts: list[str] | None = None) -> pd.DataFrame:
+    """On-demand read of columns not kept in memory (e.g. contact_email), row-aligned with the Dataset frame.
+    A frame merged from several sources passes the versions of its parts (one snapshot each, in frame order).
+    Empty frame if a snapshot is not available."""
+    frames = [_read_snapshot(v, columns=columns) for v in parts or [version]]
+    if any(f is None for f in frames):
+        return pd.DataFrame(index=pd.RangeIndex(0), columns=columns)
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+@dataclass(frozen=True)
+class SourceLoad:
+    """Outcome of loading one DataSource. origin is "memory" (unchanged, previous frame reused), "snapshot", "xlsx",
+    "fallback" (fetch/parse failed or timed out; last good copy used) or "error" (failed, nothing to fall back to)."""
+
+    source: DataSource
+    version: str | None
+    frame: pd.DataFrame | None
+    origin: str
+    seconds: float
+    error: str | None = None
+
+
+def _read_source_manifest() -> dict[str, str]:
+    try:
+        return json.loads((SNAPSHOT_DIR / SOURCE_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_source_manifest(versions: dict[str, str]) -> None:
+    """Record the last good version per source name (merged into the existing manifest, written atomically)."""
+    path = SNAPSHOT_DIR / SOURCE_MANIFEST
+    manifest = {**_read_source_manifest(), **versions}
+    tmp = path.with_suffix(".jtmp")
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("could not write source manifest: %s", e)
+
+
+def _source_fallback(
+    source: DataSource, previous: tuple[str, pd.DataFrame] | None, error: str, t0: float
+) -> SourceLoad:
+    """Last good copy of a failed source: the frame in memory, else the snapshot named in the manifest."""
+    logger.warning("source %s failed (%s); using the last good copy", source.name, error)
+    if previous is not None:
+        return SourceLoad(source, previous[0], previous[1], "fallback", time.perf_counter() - t0, error)
+    version = _read_source_manifest().get(source.name)
+    frame = _read_snapshot(version) if version else None
+    if frame is not None:
+        return SourceLoad(source, version, frame, "fallback", time.perf_counter() - t0, error)
+    return SourceLoad(source, None, None, "error", time.perf_counter() - t0, error)
+
+
+def _load_source(source: DataSource, previous: tuple[str, pd.DataFrame] | None, keep: int) -> SourceLoad:
+    """Fetch one source and parse it (snapshot cache first); the previous frame is reused if the content is the same."""
+    t0 = time.perf_counter()
+    data, error_hint = source.fetch()
+    if data is not None:
+        version = data_version(data, source.segments)
+        if previous is not None and previous[0] == version:
+            return SourceLoad(source, version, previous[1], "memory", time.perf_counter() - t0)
+        frame = _parse_workbook(data, source.segments, keep)
+        if not frame.empty:
+            return SourceLoad(source, version, frame, frame.attrs.get("source", "xlsx"), time.perf_counter() - t0)
+        error_hint = f"Excel nemá očekávané listy ({', '.join(source.segments)}) nebo soubor není platný xlsx."
+    return _source_fallback(source, previous, error_hint or "soubor nelze načíst", t0)
+
+
+def load_sources(sources: list[DataSource], previous: dict[str, tuple[str, pd.DataFrame]]) -> list[SourceLoad]:
+    """Fetch and parse all sources concurrently, one thread each (up to SOURCE_WORKERS), so the load takes about as
+    long as the slowest source. A source that fails or exceeds its timeout falls back to its last good copy without
+    holding up the others. previous maps source name -> (version, frame) of the last load."""
+    keep = SNAPSHOTS_TO_KEEP * max(1, len(sources))
+    t0 = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=max(1, min(SOURCE_WORKERS, len(sources))), thread_name_prefix="source")
+    futures = [pool.submit(_load_source, s, previous.get(s.name), keep) for s in sources]
+    loads: list[SourceLoad] = []
+    try:
+        for source, future in zip(sources, futures):
+            try:
+                loads.append(future.result(timeout=max(0.0, t0 + source.timeout - time.perf_counter())))
+            except FutureTimeoutError:  # not the builtin TimeoutError before Python 3.11
+                loads.append(_source_fallback(source, previous.get(source.name), f"timeout {source.timeout:g} s", t0))
+            except Exception as e:
+                logger.exception("loading source %s failed", source.name)
+                loads.append(_source_fallback(source, previous.get(source.name), str(e), t0))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)  # a timed-out fetch finishes in the background
+    return loads
+
+
+def merge_sources(loads: list[SourceLoad]) -> pd.DataFrame:
+    """One frame from the loaded sources (in configured order), as load_all_data() returns it for a single workbook.
+    df.attrs["data_version"] identifies the combination; df.attrs["parts"] lists the part versions (lazy columns)."""
+    parts = [load for load in loads if load.frame is not None]
+    if len(parts) == 1:
+        parts[0].frame.attrs["data_version"] = parts[0].version
+        return parts[0].frame
+    frame = _normalize_frame(pd.concat([load.frame for load in parts], ignore_index=True))  # re-unify categories
+    frame.attrs["data_version"] = hashlib.sha256(
+        "\n".join(f"{load.source.name}:{load.version}" for load in parts).encode("utf-8")
+    ).hexdigest()
+    frame.attrs["parts"] = [load.version for load in parts]
+    return frame
 
 
 def get_metric_columns_in_df(df: pd.DataFrame) -> list[str]:
@@ -214,37 +720,472 @@ def get_benchmark_columns(df: pd.DataFrame) -> list[str]:
     return ["drivers_score"] + get_metric_columns_in_df(df)
 
 
+BENCHMARK_QUANTILES = {"p25": 0.25, "p50": 0.50, "p75": 0.75}
+
+
 def compute_benchmarks_per_sheet(all_data: pd.DataFrame) -> dict[str, dict[str, dict[str, float]]]:
-    """Per segment (sheet): for each metric and drivers_score, compute P25, P50, P75."""
-    result: dict[str, dict[str, dict[str, float]]] = {}
-    for segment in all_data["segment"].unique():
-        seg_df = all_data[all_data["segment"] == segment]
-        result[segment] = {}
-        for col in get_benchmark_columns(seg_df):
-            if col not in seg_df.columns:
-                continue
-            s = seg_df[col].dropna()
-            if s.empty:
-                result[segment][col] = {"p25": 0.0, "p50": 0.0, "p75": 0.0}
-            else:
-                result[segment][col] = {
-                    "p25": float(s.quantile(0.25)),
-                    "p50": float(s.quantile(0.50)),
-                    "p75": float(s.quantile(0.75)),
-                }
+    """Per segment (sheet): for each metric and drivers_score, compute P25, P50, P75.
+    One grouped multi-quantile pass over all segments; columns with no values get zeros."""
+    if all_data.empty or "segment" not in all_data.columns:
+        return {}
+    cols = [c for c in get_benchmark_columns(all_data) if c in all_data.columns]
+    segments = all_data["segment"].unique()
+    result: dict[str, dict[str, dict[str, float]]] = {segment: {} for segment in segments}
+    if not cols:
+        return result
+    q = (
+        all_data.groupby("segment", sort=False, observed=True)[cols]
+        .quantile(list(BENCHMARK_QUANTILES.values()))
+        .fillna(0.0)
+    )
+    values = q.to_numpy(dtype=float).reshape(len(q) // len(BENCHMARK_QUANTILES), len(BENCHMARK_QUANTILES), len(cols))
+    seg_order = q.index.get_level_values(0)[:: len(BENCHMARK_QUANTILES)]
+    for segment, block in zip(seg_order, values):
+        result[segment] = {
+            col: {name: float(block[k, j]) for k, name in enumerate(BENCHMARK_QUANTILES)} for j, col in enumerate(cols)
+        }
     return result
 
 
+# Cohort dimensions within a segment for BenchmarkCube; COHORT_ALL marks a rolled-up dimension
+COHORT_COLUMNS = ["working_city", "primary_ride_type"]
+COHORT_ALL = "*"
+# Cohorts with fewer couriers fall back to their parent group (quartiles of a handful of couriers are noise)
+MIN_COHORT_SIZE = 20
+# Comparison levels offered on the scorecard -> cohort dimensions kept (the rest rolled up)
+COHORT_LEVELS = {
+    "segment": (),
+    "city": ("working_city",),
+    "ride": ("primary_ride_type",),
+    "city_ride": ("working_city", "primary_ride_type"),
+}
+COHORT_LABELS = {
+    "segment": "Segment",
+    "city": "Segment + město",
+    "ride": "Segment + typ jízd",
+    "city_ride": "Segment + město + typ jízd",
+}
+
+
+class BenchmarkCube:
+    """P25/P50/P75 of drivers_score and every metric for each segment × working_city × primary_ride_type cohort,
+    plus the roll-ups over city and/or ride type (COHORT_ALL in that position).
+
+    Built once per data version in a single grouped multi-quantile pass: the frame is stacked once per level with the
+    rolled-up dimensions set to COHORT_ALL, then grouped by all three keys. get() is a dict lookup that walks up to the
+    parent cohort (drop ride type, then city) while the cohort is smaller than min_size. The segment level equals
+    compute_benchmarks_per_sheet.
+    """
+
+    def __init__(self, all_data: pd.DataFrame):
+        self.cells: dict[tuple[str, str, str], dict[str, dict[str, float]]] = {}
+        self.sizes: dict[tuple[str, str, str], int] = {}
+        if all_data.empty or "segment" not in all_data.columns:
+            return
+        cols = [c for c in get_benchmark_columns(all_data) if c in all_data.columns]
+        keys = ["segment", *COHORT_COLUMNS]
+        present = [d for d in COHORT_COLUMNS if d in all_data.columns]
+        base = pd.DataFrame({"segment": all_data["segment"].astype(str).to_numpy()})
+        for dim in COHORT_COLUMNS:
+            base[dim] = np.asarray(all_data[dim].astype(object).fillna(""), dtype=object) if dim in present else COHORT_ALL
+        for c in cols:
+            base[c] = all_data[c].to_numpy()
+        levels = {tuple(d for d in kept if d in present) for kept in COHORT_LEVELS.values()}  # each cohort once
+        stacked = pd.concat(
+            [base.assign(**{d: COHORT_ALL for d in present if d not in kept}) for kept in levels], ignore_index=True
+        )
+        grouped = stacked.groupby(keys, sort=False)
+        self.sizes = {k: int(n) for k, n in grouped.size().items()}
+        if not cols:
+            self.cells = {k: {} for k in self.sizes}
+            return
+        q = grouped[cols].quantile(list(BENCHMARK_QUANTILES.values())).fillna(0.0)
+        nq = len(BENCHMARK_QUANTILES)
+        values = q.to_numpy(dtype=float).reshape(len(q) // nq, nq, len(cols))
+        for key, block in zip(q.index.droplevel(-1)[::nq], values):
+            self.cells[key] = {
+                col: {name: float(block[k, j]) for k, name in enumerate(BENCHMARK_QUANTILES)} for j, col in enumerate(cols)
+            }
+
+    @staticmethod
+    def cohort_key(level: str, segment: str, city: object = None, ride: object = None) -> tuple[str, str, str]:
+        kept = COHORT_LEVELS.get(level, ())
+        return (
+            str(segment),
+            _cell_str(city) if "working_city" in kept else COHORT_ALL,
+            _cell_str(ride) if "primary_ride_type" in kept else COHORT_ALL,
+        )
+
+    @staticmethod
+    def label(key: tuple[str, str, str]) -> str:
+        """("OOH", "Brno", "*") -> "OOH · Brno"."""
+        return " · ".join(v or "—" for v in key if v != COHORT_ALL)
+
+    def get(
+        self, key: tuple[str, str, str], min_size: int = MIN_COHORT_SIZE
+    ) -> tuple[tuple[str, str, str], dict[str, dict[str, float]], int]:
+        """(cohort actually used, its benchmarks, its courier count) for key, walking up to the parent cohort
+        (ride type rolled up, then city) while the cohort has fewer than min_size couriers."""
+        segment, city, ride = key
+        chain = [key, (segment, city, COHORT_ALL), (segment, COHORT_ALL, COHORT_ALL)]
+        for k in chain:
+            if self.sizes.get(k, 0) >= min_size:
+                return k, self.cells[k], self.sizes[k]
+        k = chain[-1]
+        return k, self.cells.get(k, {}), self.sizes.get(k, 0)
+
+
+ELIGIBILITY_LABELS = {
+    "top20": "Top 20 %: priority + rezervace",
+    "top50": "Top 50 %: rezervace",
+    "bottom": "Zatím bez rezervací/priorit",
+}
+
+
 def get_eligibility(rank: int, total: int) -> tuple[str, str]:
     """Returns (badge_class_suffix, label). Percentile = rank / total (rank 1 = top)."""
     if total <= 0:
         return "bottom", "—"
     pct = rank / total  # rank 1 in 100 => 1%, so top 20% => rank <= 20
     if pct <= 0.20:
-        return "top20", "Top 20 %: priority + rezervace"
+        return "top20", ELIGIBILITY_LABELS["top20"]
     if pct <= 0.50:
-        return "top50", "Top 50 %: rezervace"
-    return "bottom", "Zatím bez rezervací/priorit"
+        return "top50", ELIGIBILITY_LABELS["top50"]
+    return "bottom", ELIGIBILITY_LABELS["bottom"]
+
+
+def eligibility_tiers(ranks: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Vectorized get_eligibility: "top20" / "top50" / "bottom" per row, "none" where the segment total is 0."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(totals > 0, ranks / totals, np.nan)
+    return np.select([totals <= 0, pct <= 0.20, pct <= 0.50], ["none", "top20", "top50"], "bottom")
+
+
+def driver_key(driver_id: object, segment: object) -> str:
+    """Stable identifier of one scorecard row: the same courier can appear in several segments."""
+    return f"{driver_id}|{segment}"
+
+
+class DriverIndex:
+    """Per-row lookups precomputed once per data version, so the scorecard header needs no scans.
+
+    Holds segment sizes, driver_key -> row position, selectbox labels, and for every row its segment total,
+    rank, "better than X %" and get_eligibility tier.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+
+        def column(name: str) -> list:
+            return df[name].tolist() if name in df.columns else ["—"] * n
+
+        segments = column("segment")
+        ids = column("driver_id")
+        self.keys = [driver_key(d, seg) for d, seg in zip(ids, segments)]
+        self.positions: dict[str, int] = {}
+        for i, key in enumerate(self.keys):
+            self.positions.setdefault(key, i)
+        self.labels = [
+            f"{name} | {did} | {city} | {seg}"
+            for name, did, city, seg in zip(column("full_name"), ids, column("working_city"), segments)
+        ]
+        seg_series = pd.Series(segments, dtype=object)
+        self.segment_sizes: dict[str, int] = {k: int(v) for k, v in seg_series.value_counts(sort=False).items()}
+        self.totals = seg_series.map(self.segment_sizes).to_numpy(dtype=np.int64)
+        ranks = pd.to_numeric(df["rank"], errors="coerce") if "rank" in df.columns else pd.Series(np.zeros(n))
+        self.ranks = ranks.fillna(0).to_numpy(dtype=np.int64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.pct_better = np.where(
+                self.totals > 0, np.round((self.totals - self.ranks) / self.totals * 100), 0
+            ).astype(np.int64)
+        self.tiers = eligibility_tiers(self.ranks, self.totals)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def eligibility(self, pos: int) -> tuple[str, str]:
+        """get_eligibility(rank, total) for the row at position pos."""
+        tier = str(self.tiers[pos])
+        return ("bottom", "—") if tier == "none" else (tier, ELIGIBILITY_LABELS[tier])
+
+
+# Eligibility tiers as (badge class, share of the segment from the top)
+TIER_SHARES = [("top20", 0.20), ("top50", 0.50)]
+
+
+@dataclass(frozen=True)
+class TierGap:
+    """What one courier needs to reach a tier: rank cut-off, the score at that cut-off and the distance to it."""
+
+    tier: str
+    label: str
+    reached: bool
+    threshold_rank: int
+    threshold_score: float | None
+    score_gap: float | None
+    overtake: int
+
+
+class SegmentLadder:
+    """Per segment, drivers_score sorted descending and every metric sorted ascending, once per data version.
+    Tier gaps and metric percentiles are then a few binary searches; nothing is sorted per request."""
+
+    def __init__(self, df: pd.DataFrame, metric_cols: list[str]):
+        self.metric_cols = list(metric_cols)
+        self.scores_desc: dict[str, np.ndarray] = {}
+        self.metrics_sorted: dict[str, dict[str, np.ndarray]] = {}
+        if df.empty or "segment" not in df.columns:
+            return
+        for segment, idx in df.groupby("segment", sort=False, observed=True).indices.items():
+            part = df.iloc[idx]
+            if "drivers_score" in part.columns:
+                scores = part["drivers_score"].to_numpy(dtype=float, na_value=np.nan)
+                self.scores_desc[segment] = np.sort(scores[~np.isnan(scores)])[::-1]
+            self.metrics_sorted[segment] = {}
+            for col in self.metric_cols:
+                values = part[col].to_numpy(dtype=float, na_value=np.nan)
+                self.metrics_sorted[segment][col] = np.sort(values[~np.isnan(values)])
+
+    def tier_gaps(self, segment: str, rank: int, score: float | None, total: int) -> list[TierGap]:
+        """For each tier in TIER_SHARES: reached? (same rule as get_eligibility), the last rank inside it, the score
+        of the courier at that rank, how much score is missing and how many couriers must be overtaken."""
+        scores = self.scores_desc.get(segment, np.empty(0))
+        out = []
+        for tier, share in TIER_SHARES:
+            threshold_rank = int(np.floor(share * total + 1e-9)) if total > 0 else 0
+            reached = total > 0 and rank / total <= share
+            threshold_score = float(scores[threshold_rank - 1]) if 0 < threshold_rank <= len(scores) else None
+            gap = None
+            if threshold_score is not None and score is not None and not np.isnan(score):
+                gap = max(0.0, threshold_score - float(score))
+            overtake = 0 if reached else max(0, rank - threshold_rank)
+            out.append(TierGap(tier, ELIGIBILITY_LABELS[tier], reached, threshold_rank, threshold_score, gap, overtake))
+        return out
+
+    def percentile(self, segment: str, col: str, value: float) -> float | None:
+        """Share (0-100) of the segment below value, ties counted half (mid-rank percentile)."""
+        values = self.metrics_sorted.get(segment, {}).get(col)
+        if values is None or len(values) == 0 or value is None or np.isnan(value):
+            return None
+        below = np.searchsorted(values, value, side="left")
+        equal = np.searchsorted(values, value, side="right") - below
+        return float((below + 0.5 * equal) / len(values) * 100)
+
+    def metric_percentiles(self, segment: str, row: pd.Series) -> dict[str, float | None]:
+        return {col: self.percentile(segment, col, float(row.get(col, np.nan))) for col in self.metric_cols}
+
+
+# Leaderboard: bins per histogram (what goes to the browser, whatever the segment size)
+HISTOGRAM_BINS = 30
+
+
+@dataclass(frozen=True)
+class Histogram:
+    counts: np.ndarray  # HISTOGRAM_BINS courier counts
+    edges: np.ndarray  # HISTOGRAM_BINS + 1 bin edges
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per bin, labelled by its range, for st.bar_chart."""
+        labels = [f"{a:.2f}–{b:.2f}" for a, b in zip(self.edges[:-1], self.edges[1:])]
+        return pd.DataFrame({"Kurýrů": self.counts}, index=pd.Index(labels, name="Rozsah"))
+
+
+class SegmentLeaderboard:
+    """Whole-segment rank table and metric distributions, built once per data version.
+
+    For every segment and sortable column (rank, drivers_score, each metric, full_name) the segment's row positions
+    are presorted ascending with missing values last, so a sorted, filtered page is a mask over one presorted array
+    plus a slice; only the page's rows are ever materialized. Every metric also gets a HISTOGRAM_BINS-bin histogram,
+    and the drivers_score cut-offs of the TIER_SHARES tiers come from the ladder. working_city is kept as integer
+    codes with the sorted cities of each segment, so the city filter and its options never scan the frame.
+    """
+
+    def __init__(self, df: pd.DataFrame, drivers: DriverIndex, ladder: SegmentLadder, metric_cols: list[str]):
+        self.sort_columns = ["rank"] + [c for c in ["drivers_score", *metric_cols] if c in df.columns]
+        if "full_name" in df.columns:
+            self.sort_columns.append("full_name")
+        self.orders: dict[str, dict[str, tuple[np.ndarray, int]]] = {}
+        self.histograms: dict[str, dict[str, Histogram]] = {}
+        self.cutoffs: dict[str, dict[str, float | None]] = {}
+        self.cities: dict[str, list[str]] = {}
+        self._tiers = drivers.tiers
+        self._city_codes = np.full(len(df), -1, dtype=np.int32)
+        self._city_ids: dict[str, int] = {}
+        if df.empty or "segment" not in df.columns:
+            return
+        city_names: list[str] = []
+        if "working_city" in df.columns:
+            codes, uniques = pd.factorize(df["working_city"])
+            self._city_codes = codes.astype(np.int32)
+            city_names = [str(c) for c in uniques]
+            self._city_ids = {c: i for i, c in enumerate(city_names)}
+        columns: dict[str, np.ndarray] = {"rank": np.where(drivers.ranks > 0, drivers.ranks, np.nan)}
+        for col in self.sort_columns[1:]:
+            if col == "full_name":
+                columns[col] = df["full_name"].astype(str).str.lower().to_numpy(dtype=object)
+            else:
+                columns[col] = df[col].to_numpy(dtype=float, na_value=np.nan)
+        for segment, idx in df.groupby("segment", sort=False, observed=True).indices.items():
+            idx = idx.astype(np.int32)
+            orders: dict[str, tuple[np.ndarray, int]] = {}
+            histograms: dict[str, Histogram] = {}
+            for col in self.sort_columns:
+                values = columns[col][idx]
+                if col == "full_name":
+                    orders[col] = idx[np.argsort(values, kind="stable")], len(idx)
+                    continue
+                valid = ~np.isnan(values)
+                orders[col] = idx[np.argsort(values, kind="stable")], int(valid.sum())  # NaN sorts last
+                if col != "rank" and valid.any():
+                    counts, edges = np.histogram(values[valid], bins=HISTOGRAM_BINS)
+                    histograms[col] = Histogram(counts, edges)
+            self.orders[segment] = orders
+            self.histograms[segment] = histograms
+            self.cities[segment] = sorted(city_names[c] for c in np.unique(self._city_codes[idx]) if c >= 0)
+            scores = ladder.scores_desc.get(segment, np.empty(0))
+            total = drivers.segment_sizes.get(segment, 0)
+            self.cutoffs[segment] = {}
+            for tier, share in TIER_SHARES:
+                k = int(np.floor(share * total + 1e-9))
+                self.cutoffs[segment][tier] = float(scores[k - 1]) if 0 < k <= len(scores) else None
+
+    def order(self, segment: str, sort: str = "rank", descending: bool = False) -> np.ndarray:
+        """Row positions of the segment sorted by sort; missing values stay last in both directions."""
+        positions, n_valid = self.orders.get(segment, {}).get(sort, (np.empty(0, dtype=np.int32), 0))
+        if not descending:
+            return positions
+        return np.concatenate([positions[:n_valid][::-1], positions[n_valid:]])
+
+    def rows(
+        self,
+        segment: str,
+        sort: str = "rank",
+        descending: bool = False,
+        *,
+        city: str | None = None,
+        tiers: list[str] | None = None,
+        within: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Sorted row positions of the segment in city, with a DriverIndex tier in tiers and among the row positions
+        within (e.g. search hits); each filter looks only at the segment's rows. A page is a slice."""
+        positions = self.order(segment, sort, descending)
+        if city is not None:
+            positions = positions[self._city_codes[positions] == self._city_ids.get(city, -2)]
+        if tiers:
+            positions = positions[np.isin(self._tiers[positions], tiers)]
+        if within is not None:
+            positions = positions[np.isin(positions, within)]
+        return positions
+
+
+# What-if simulator: a segment needs at least this many complete rows per fitted coefficient; below WHAT_IF_MIN_R2
+# the UI flags the prediction as rough
+MIN_FIT_ROWS_PER_COEF = 5
+WHAT_IF_MIN_R2 = 0.5
+
+
+@dataclass(frozen=True)
+class SegmentFit:
+    """Least-squares fit drivers_score ≈ intercept + coef · metrics of one segment, with its in-sample quality."""
+
+    columns: list[str]
+    coef: np.ndarray
+    intercept: float
+    means: np.ndarray  # per column, stands in for a courier's missing metric
+    r2: float
+    rmse: float
+    n: int
+
+
+@dataclass(frozen=True)
+class WhatIf:
+    """One simulated change: the score after it and the rank and tier that score would get in the segment."""
+
+    score: float | None
+    predicted_score: float
+    rank: int
+    new_rank: int
+    total: int
+    tier: str
+    label: str
+    fit: SegmentFit
+
+
+class ScoreModel:
+    """Per segment, drivers_score fitted linearly on the metric columns once per data version.
+
+    simulate() moves a courier's actual score by the model's change for the edited metrics (so unchanged metrics
+    keep the current score, residual included) and places the new score with a binary search into the ladder's
+    presorted segment scores; nothing is refitted or scanned per request.
+    """
+
+    def __init__(self, df: pd.DataFrame, drivers: DriverIndex, ladder: SegmentLadder, metric_cols: list[str]):
+        self.drivers = drivers
+        self.ladder = ladder
+        self.fits: dict[str, SegmentFit] = {}
+        columns = [c for c in metric_cols if c in df.columns]
+        self.column_index = {c: i for i, c in enumerate(columns)}
+        if df.empty or "segment" not in df.columns or "drivers_score" not in df.columns or not columns:
+            self.values = np.empty((len(df), 0), dtype=np.float32)
+            self.scores = np.full(len(df), np.nan, dtype=np.float32)
+            return
+        self.values = df[columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        self.scores = df["drivers_score"].to_numpy(dtype=np.float32, na_value=np.nan)
+        for segment, idx in df.groupby("segment", sort=False, observed=True).indices.items():
+            x, y = self.values[idx].astype(float), self.scores[idx].astype(float)
+            complete = ~np.isnan(y) & ~np.isnan(x).any(axis=1)
+            n = int(complete.sum())
+            if n < MIN_FIT_ROWS_PER_COEF * (len(columns) + 1):
+                continue
+            x, y = x[complete], y[complete]
+            design = np.column_stack([np.ones(n), x])
+            solution, *_ = np.linalg.lstsq(design, y, rcond=None)
+            residuals = y - design @ solution
+            ss_tot = float(((y - y.mean()) ** 2).sum())
+            ss_res = float((residuals**2).sum())
+            self.fits[segment] = SegmentFit(
+                columns=columns,
+                coef=solution[1:],
+                intercept=float(solution[0]),
+                means=x.mean(axis=0),
+                r2=1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0,
+                rmse=float(np.sqrt(ss_res / n)),
+                n=n,
+            )
+
+    def fit(self, segment: str) -> SegmentFit | None:
+        return self.fits.get(segment)
+
+    def simulate(self, pos: int, segment: str, changes: dict[str, float]) -> WhatIf | None:
+        """Score, rank and tier of the row at pos if its metrics took the values in changes (column -> value).
+        None if the segment has no fit (too few complete rows)."""
+        fit = self.fits.get(segment)
+        if fit is None:
+            return None
+        current = self.values[pos].astype(float)
+        old = np.where(np.isnan(current), fit.means, current)
+        new = old.copy()
+        for col, value in changes.items():
+            if col in self.column_index and value is not None and not np.isnan(value):
+                new[self.column_index[col]] = value
+        base = self.scores[pos]
+        score = None if np.isnan(base) else float(base)
+        if score is None:
+            base = fit.intercept + float(fit.coef @ old)
+        predicted = float(base + fit.coef @ (new - old))
+        rank = int(self.drivers.ranks[pos])
+        if score is not None and (new == old).all():
+            new_rank = rank
+        else:
+            # 1 + couriers of the segment with a strictly higher score, the courier's own current score left out
+            scores_desc = self.ladder.scores_desc.get(segment, np.empty(0))
+            higher = int(np.searchsorted(-scores_desc, -predicted, side="left"))
+            if score is not None and score > predicted:
+                higher -= 1
+            new_rank = higher + 1
+        total = self.drivers.segment_sizes.get(segment, 0)
+        tier, label = get_eligibility(new_rank, total)
+        return WhatIf(score, predicted, rank, new_rank, total, tier, label, fit)
 
 
 # -----------------------------------------------------------------------------
@@ -256,21 +1197,215 @@ def _normalize(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip().lower())
 
 
-def search_drivers(all_data: pd.DataFrame, query: str) -> pd.DataFrame:
-    """Search by driver_id (exact or partial) or full_name (partial, case-insensitive)."""
+def _fold(s: str) -> str:
+    """_normalize plus diacritics removed ("Novák" -> "novak")."""
+    s = unicodedata.normalize("NFKD", s or "")
+    return _normalize("".join(c for c in s if not unicodedata.combining(c)))
+
+
+def _cell_str(v: object) -> str:
+    return "" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v)
+
+
+# Fuzzy search: results shown, and candidate tokens per query word that get a full edit-distance check
+FUZZY_TOP_K = 10
+FUZZY_CANDIDATES = 64
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f" {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _deletes(word: str) -> set[str]:
+    """word and every variant with one character removed (symmetric-delete neighbourhood)."""
+    return {word} | {word[:i] + word[i + 1 :] for i in range(len(word))}
+
+
+def _max_typos(word: str) -> int:
+    return 1 if len(word) <= 4 else 2 if len(word) <= 8 else 3
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (insert/delete/substitute/swap adjacent); returns limit + 1 once exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SearchIndex:
+    """Search structures over one data version, built once; all queries return row positions into the frame.
+
+    - names / ids: folded full_name and lowercased driver_id per row, also joined into one newline-separated
+      blob each, so a substring query is a C-level str.find over the blob instead of a per-row scan;
+    - id_positions: exact driver_id -> positions (a courier can appear in several segments);
+    - vocab: sorted distinct name tokens with their positions, for prefix queries via bisect;
+    - trigram postings and one-delete variants of each vocab token -> token ids, for typo-tolerant fuzzy().
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        full_names = df["full_name"].tolist() if "full_name" in df.columns else [""] * n
+        driver_ids = df["driver_id"].tolist() if "driver_id" in df.columns else [""] * n
+        self.names = [_fold(_cell_str(v)) for v in full_names]
+        self.ids = [_cell_str(v).strip().lower() for v in driver_ids]
+        self._name_blob, self._name_starts = self._blob(self.names)
+        self._id_blob, self._id_starts = self._blob(self.ids)
+        tokens = sorted((tok, i) for i, name in enumerate(self.names) for tok in name.split(" ") if tok)
+        self.id_positions: dict[str, list[int]] = {}
+        for i, did in enumerate(self.ids):
+            if did:
+                self.id_positions.setdefault(did, []).append(i)
+        self.vocab: list[str] = []
+        self.vocab_positions: list[list[int]] = []
+        for tok, i in tokens:
+            if not self.vocab or self.vocab[-1] != tok:
+                self.vocab.append(tok)
+                self.vocab_positions.append([])
+            self.vocab_positions[-1].append(i)
+        postings: dict[str, list[int]] = {}
+        for t, tok in enumerate(self.vocab):
+            for g in _trigrams(tok):
+                postings.setdefault(g, []).append(t)
+        self._trigram_postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._delete_postings: dict[str, list[int]] = {}
+        for t, tok in enumerate(self.vocab):
+            for v in _deletes(tok):
+                self._delete_postings.setdefault(v, []).append(t)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def _blob(values: list[str]) -> tuple[str, list[int]]:
+        starts: list[int] = []
+        offset = 0
+        for v in values:
+            starts.append(offset)
+            offset += len(v) + 1
+        return "\n".join(values), starts
+
+    @staticmethod
+    def _find_all(blob: str, starts: list[int], q: str) -> list[int]:
+        """Rows whose value contains q; after a hit, the search resumes at the next row."""
+        out: list[int] = []
+        pos = blob.find(q)
+        while pos != -1:
+            row = bisect_right(starts, pos) - 1
+            out.append(row)
+            if row + 1 >= len(starts):
+                break
+            pos = blob.find(q, starts[row + 1])
+        return out
+
+    def exact_id(self, driver_id: object) -> np.ndarray:
+        """Rows with exactly this driver_id (case-insensitive)."""
+        return np.asarray(self.id_positions.get(_cell_str(driver_id).strip().lower(), []), dtype=np.intp)
+
+    def prefix(self, query: str) -> np.ndarray:
+        """Rows where every query word is a prefix of some name word ("nov j" -> "Jan Novák"). Sorted positions."""
+        result: set[int] | None = None
+        for w in _fold(query).split(" "):
+            if not w:
+                continue
+            lo = bisect_left(self.vocab, w)
+            hi = bisect_left(self.vocab, w + "\uffff")
+            hits = {i for positions in self.vocab_positions[lo:hi] for i in positions}
+            result = hits if result is None else result & hits
+        return np.asarray(sorted(result or ()), dtype=np.intp)
+
+    def search(self, query: str) -> np.ndarray:
+        """Same semantics as search_drivers: name contains query, every query word starts a name word, or
+        driver_id contains / equals it. Sorted positions."""
+        q = _normalize(query)
+        if not q or "\n" in q:
+            return np.empty(0, dtype=np.intp)
+        folded = _fold(q)
+        hits = set(self._find_all(self._name_blob, self._name_starts, folded))
+        if " " in folded:
+            # A one-word prefix hit is already a substring hit; words in another order are not
+            hits.update(self.prefix(folded).tolist())
+        hits.update(self._find_all(self._id_blob, self._id_starts, q))
+        return np.asarray(sorted(hits), dtype=np.intp)
+
+    def _fuzzy_word(self, word: str) -> dict[int, tuple[int, float]]:
+        """Rows with a name token within _max_typos(word) edits of word (or of its prefix) -> (distance, similarity).
+        Candidates are tokens one edit away (shared delete variant) plus the FUZZY_CANDIDATES tokens sharing most
+        trigrams with word; only those get an edit-distance check, which bounds the latency."""
+        grams = _trigrams(word)
+        counts = np.zeros(len(self.vocab), dtype=np.int64)
+        lists = [self._trigram_postings[g] for g in grams if g in self._trigram_postings]
+        candidates: set[int] = set()
+        if lists:
+            counts = np.bincount(np.concatenate(lists), minlength=len(self.vocab))
+            k = min(FUZZY_CANDIDATES, int(np.count_nonzero(counts)))
+            candidates.update(np.argpartition(-counts, k - 1)[:k].tolist())
+        for v in _deletes(word):
+            candidates.update(self._delete_postings.get(v, ()))
+        limit = _max_typos(word)
+        rows: dict[int, tuple[int, float]] = {}
+        for t in candidates:
+            tok = self.vocab[t]
+            dist = min(_edit_distance(word, tok, limit), _edit_distance(word, tok[: len(word)], limit) + 1)
+            if dist > limit:
+                continue
+            sim = counts[t] / len(grams | _trigrams(tok))
+            for i in self.vocab_positions[t]:
+                if i not in rows or (dist, -sim) < (rows[i][0], -rows[i][1]):
+                    rows[i] = (dist, sim)
+        return rows
+
+    def fuzzy(self, query: str, k: int = FUZZY_TOP_K) -> np.ndarray:
+        """Top-k rows for a possibly misspelled name: exact/substring hits (search()) first, then rows ranked by
+        number of unmatched query words, summed edit distance and trigram similarity."""
+        exact = self.search(query)
+        if len(exact) >= k:
+            return exact[:k]
+        words = [w for w in _fold(query).split(" ") if w]
+        if not words:
+            return exact
+        per_word = [self._fuzzy_word(w) for w in words]
+        seen = set(exact.tolist())
+        scored: list[tuple[int, int, float, int]] = []
+        for i in set().union(*per_word) - seen:
+            missing, dist, sim = 0, 0, 0.0
+            for hits in per_word:
+                if i in hits:
+                    dist += hits[i][0]
+                    sim += hits[i][1]
+                else:
+                    missing += 1
+            scored.append((missing, dist, -sim, i))
+        scored.sort()
+        fuzzy = [i for *_, i in scored[: k - len(exact)]]
+        return np.concatenate([exact, np.asarray(fuzzy, dtype=np.intp)])
+
+
+def search_drivers(all_data: pd.DataFrame, query: str, index: SearchIndex) -> pd.DataFrame:
+    """Search by driver_id (exact or partial) or full_name (partial or word prefixes, case- and
+    diacritics-insensitive). index is the dataset's prebuilt SearchIndex over all_data (Dataset.search)."""
+    if index is None:
+        raise ValueError("search_drivers needs the dataset's SearchIndex (Dataset.search)")
+    if len(index) != len(all_data):
+        raise ValueError(f"SearchIndex covers {len(index)} rows, all_data has {len(all_data)}")
     if not query or all_data.empty:
         return pd.DataFrame()
-    q = _normalize(query)
-    if not q:
+    positions = index.search(query)
+    if len(positions) == 0:
         return pd.DataFrame()
-
-    def matches(row: pd.Series) -> bool:
-        name = _normalize(str(row.get("full_name", "")))
-        did = str(row.get("driver_id", "")).strip().lower()
-        return q in name or q in did or (q.isdigit() and did == q)
-
-    mask = all_data.apply(matches, axis=1)
-    return all_data[mask].copy()
+    return all_data.iloc[positions]
 
 
 # -----------------------------------------------------------------------------
@@ -331,6 +1466,824 @@ def get_insights(
     return strengths, focus, at_median
 
 
+class InsightTable:
+    """get_insights for every row at once, computed once per data version.
+
+    Holds the row x metric delta matrix (value - segment P50), the at-median mask (|delta| <= AT_MEDIAN_TOLERANCE)
+    and metric indices of the top-2 strengths / top-3 focus areas per row (-1 = none), ranked with a stable argsort
+    so ties keep METRIC_COLUMNS order exactly like get_insights.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        benchmarks_by_sheet: dict[str, dict[str, dict[str, float]]],
+        metric_cols: list[str],
+    ):
+        self.metric_cols = list(metric_cols)
+        self.benchmarks_by_sheet = benchmarks_by_sheet
+        n, m = len(df), len(self.metric_cols)
+        self.segments = df["segment"].to_numpy() if "segment" in df.columns else np.full(n, "", dtype=object)
+        seg_codes, seg_uniques = pd.factorize(self.segments)
+        p50 = np.array(
+            [[benchmarks_by_sheet.get(seg, {}).get(c, {}).get("p50") or 0 for c in self.metric_cols] for seg in seg_uniques],
+            dtype=float,
+        ).reshape(len(seg_uniques), m)
+        values = df[self.metric_cols].to_numpy(dtype=float, na_value=np.nan) if m else np.empty((n, 0))
+        self.values = values
+        self.deltas = values - p50[seg_codes] if n else np.empty((0, m))
+        with np.errstate(invalid="ignore"):
+            above = self.deltas > AT_MEDIAN_TOLERANCE
+            below = self.deltas < -AT_MEDIAN_TOLERANCE
+            self.at_median = np.abs(self.deltas) <= AT_MEDIAN_TOLERANCE
+        self.strengths = self._top(np.where(above, -self.deltas, np.inf), 2)
+        self.focus = self._top(np.where(below, self.deltas, np.inf), 3)
+
+    @staticmethod
+    def _top(sort_key: np.ndarray, k: int) -> np.ndarray:
+        """Column indices of the k smallest finite keys per row (stable), padded with -1."""
+        k_eff = min(k, sort_key.shape[1])
+        order = np.argsort(sort_key, axis=1, kind="stable")[:, :k_eff]
+        valid = np.isfinite(np.take_along_axis(sort_key, order, axis=1))
+        out = np.full((sort_key.shape[0], k), -1, dtype=np.int8)
+        out[:, :k_eff] = np.where(valid, order, -1)
+        return out
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def _item(self, pos: int, j: int) -> tuple[str, float, dict]:
+        col = self.metric_cols[j]
+        b = self.benchmarks_by_sheet.get(self.segments[pos], {}).get(col, {})
+        delta = float(self.deltas[pos, j])
+        return col, float(self.values[pos, j]), {**b, "delta_to_median": delta, "recommendation": RECOMMENDATIONS.get(col, "")}
+
+    def insights_at(
+        self, pos: int
+    ) -> tuple[list[tuple[str, float, dict]], list[tuple[str, float, dict]], list[tuple[str, float, dict]]]:
+        """Same (strengths, focus_next, at_median) as get_insights for the row at position pos."""
+        strengths = [self._item(pos, j) for j in self.strengths[pos] if j >= 0]
+        focus = [self._item(pos, j) for j in self.focus[pos] if j >= 0]
+        at_median = [self._item(pos, j) for j in np.flatnonzero(self.at_median[pos])]
+        return strengths, focus, at_median
+
+    def names_at(self, positions: np.ndarray) -> pd.DataFrame:
+        """Strength/focus metric names (empty string = none) for the given rows, in that order."""
+        positions = np.asarray(positions, dtype=np.intp)
+        names = np.array(self.metric_cols + [""], dtype=object)  # index -1 -> ""
+        out = pd.DataFrame(index=pd.RangeIndex(len(positions)))
+        for k in range(self.strengths.shape[1]):
+            out[f"strength_{k + 1}"] = names[self.strengths[positions, k]]
+        for k in range(self.focus.shape[1]):
+            out[f"focus_{k + 1}"] = names[self.focus[positions, k]]
+        out["at_median"] = [", ".join(names[np.flatnonzero(row)]) for row in self.at_median[positions]]
+        return out
+
+
+# -----------------------------------------------------------------------------
+# History (multiple months)
+# -----------------------------------------------------------------------------
+
+
+def history_month(path: Path) -> str | None:
+    """"Priority Booking 02-26 results.xlsx" -> "2026-02"; None for other files."""
+    m = HISTORY_FILE_PATTERN.search(path.name)
+    return f"20{m.group(2)}-{m.group(1)}" if m else None
+
+
+class HistoryStore:
+    """Append-only columnar store of monthly results: one Parquet partition per month plus a manifest.
+
+    sync() parses only workbooks that are new or whose content changed (mtime/size pre-check, then content
+    hash); a changed month replaces its own partition, nothing else is rewritten. Partitions of workbooks
+    that disappear from the source directory are kept.
+    """
+
+    def __init__(self, source_dir: Path, store_dir: Path = HISTORY_DIR):
+        self.source_dir = source_dir
+        self.store_dir = store_dir
+        self.manifest_path = store_dir / "manifest.json"
+
+    def _read_manifest(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: dict[str, dict]) -> None:
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.manifest_path)
+
+    def source_files(self) -> dict[str, Path]:
+        """month -> workbook path for every matching file in source_dir."""
+        if not self.source_dir.is_dir():
+            return {}
+        files = {}
+        for path in sorted(self.source_dir.iterdir()):
+            month = history_month(path)
+            if month:
+                files[month] = path
+        return files
+
+    def signature(self) -> tuple:
+        """Cheap change check: (name, mtime_ns, size) of every monthly workbook."""
+        out = []
+        for path in self.source_files().values():
+            try:
+                st_ = path.stat()
+            except OSError:
+                continue
+            out.append((path.name, st_.st_mtime_ns, st_.st_size))
+        return tuple(out)
+
+    def sync(self) -> list[str]:
+        """Ingest new or changed monthly workbooks. Returns the months that were (re)written."""
+        manifest = self._read_manifest()
+        changed: list[str] = []
+        for month, path in self.source_files().items():
+            st_ = path.stat()
+            entry = manifest.get(month, {})
+            if entry.get("file") == path.name and entry.get("mtime_ns") == st_.st_mtime_ns and entry.get("size") == st_.st_size:
+                continue
+            data = path.read_bytes()
+            version = data_version(data)
+            if entry.get("sha256") != version:
+                try:
+                    frame, _ = _read_workbook(data)  # not via the snapshot cache: it only keeps recent versions
+                except Exception:
+                    frame = pd.DataFrame()
+                if frame.empty:
+                    logger.warning("history: %s has no expected sheets, skipped", path.name)
+                    continue
+                frame = _normalize_frame(frame)
+                part = frame[[c for c in HISTORY_COLUMNS if c in frame.columns]].copy()
+                part["driver_id"] = part["driver_id"].map(_cell_str)
+                part.insert(0, "month", month)
+                self.store_dir.mkdir(parents=True, exist_ok=True)
+                target = self.store_dir / f"month={month}.parquet"
+                tmp = target.with_suffix(".tmp")
+                part.to_parquet(tmp, index=False)
+                os.replace(tmp, target)
+                changed.append(month)
+                logger.info("history: ingested %s (%d rows)", month, len(part))
+                rows = len(part)
+            else:
+                rows = int(entry.get("rows", 0))
+            manifest[month] = {"file": path.name, "mtime_ns": st_.st_mtime_ns, "size": st_.st_size, "sha256": version, "rows": rows}
+        self._write_manifest(manifest)
+        return changed
+
+    def load(self) -> DriverHistory:
+        parts = [pd.read_parquet(p) for p in sorted(self.store_dir.glob("month=*.parquet"))]
+        frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["month"] + HISTORY_COLUMNS)
+        return DriverHistory(frame)
+
+
+class DriverHistory:
+    """All months sorted by (driver_key, month) with driver_key -> (start, stop), so one courier's trend is a slice."""
+
+    def __init__(self, frame: pd.DataFrame):
+        keys = [driver_key(d, seg) for d, seg in zip(frame["driver_id"].tolist(), frame["segment"].tolist())]
+        order = np.lexsort((frame["month"].to_numpy(dtype=str), np.asarray(keys, dtype=object).astype(str)))
+        self.frame = frame.iloc[order].reset_index(drop=True)
+        sorted_keys = np.asarray(keys, dtype=object)[order]
+        self.months = sorted(frame["month"].unique().tolist())
+        self.slices: dict[str, tuple[int, int]] = {}
+        if len(sorted_keys):
+            uniq, starts = np.unique(sorted_keys.astype(str), return_index=True)
+            stops = np.append(starts[1:], len(sorted_keys))
+            self.slices = {k: (int(a), int(b)) for k, a, b in zip(uniq, starts, stops)}
+        self._diffs: dict[tuple[str, str], MonthDiff] = {}
+
+    def trend(self, key: str) -> pd.DataFrame:
+        """Month rows of one driver_id|segment, oldest first (empty frame if unknown)."""
+        start, stop = self.slices.get(key, (0, 0))
+        return self.frame.iloc[start:stop]
+
+    def month(self, month: str) -> pd.DataFrame:
+        return self.frame[self.frame["month"].to_numpy() == month]
+
+    def diff(self, old: str, new: str) -> MonthDiff:
+        """MonthDiff of two months, built on first use and kept for the lifetime of this history version."""
+        key = (old, new)
+        cached = self._diffs.get(key)
+        if cached is None:
+            t0 = time.perf_counter()
+            metric_cols = [c for c in METRIC_COLUMNS if c in self.frame.columns]
+            cached = MonthDiff(self.month(old), self.month(new), metric_cols)
+            self._diffs[key] = cached
+            logger.info("month diff %s -> %s built in %.3f s (%d rows)", old, new, time.perf_counter() - t0, len(cached.frame))
+        return cached
+
+
+# Tier order for MonthDiff.tier_move (higher = better)
+TIER_LEVELS = {"none": 0, "bottom": 0, "top50": 1, "top20": 2}
+
+
+class MonthDiff:
+    """Changes of every driver_key between two months, from one outer join on (driver_id, segment).
+
+    frame columns: driver_key, driver_id, segment, status ("both" / "new" / "left"), rank_old, rank_new,
+    rank_change (positive = moved up), score_old, score_new, score_change, tier_old, tier_new, tier_move
+    (+1/+2 = better tier, negative = worse, 0 = same; NA unless in both months) and "Δ <metric>" per metric.
+    Rows in both months are additionally presorted by rank_change per segment, so movers() is a slice.
+    """
+
+    def __init__(self, old: pd.DataFrame, new: pd.DataFrame, metric_cols: list[str]):
+        self.metric_cols = metric_cols
+        merged = self._prepare(old, metric_cols).merge(
+            self._prepare(new, metric_cols), on=["driver_id", "segment"], how="outer", suffixes=("_old", "_new"), indicator=True
+        )
+        out = pd.DataFrame(
+            {
+                "driver_key": [driver_key(d, seg) for d, seg in zip(merged["driver_id"].tolist(), merged["segment"].tolist())],
+                "driver_id": merged["driver_id"],
+                "segment": merged["segment"],
+                "status": merged["_merge"].map({"both": "both", "left_only": "left", "right_only": "new"}).astype(str),
+                "rank_old": merged["rank_old"].astype("Int64"),
+                "rank_new": merged["rank_new"].astype("Int64"),
+            }
+        )
+        out["rank_change"] = out["rank_old"] - out["rank_new"]
+        out["score_old"] = merged["drivers_score_old"]
+        out["score_new"] = merged["drivers_score_new"]
+        out["score_change"] = out["score_new"] - out["score_old"]
+        out["tier_old"] = merged["tier_old"].fillna("")
+        out["tier_new"] = merged["tier_new"].fillna("")
+        out["tier_move"] = (out["tier_new"].map(TIER_LEVELS) - out["tier_old"].map(TIER_LEVELS)).astype("Int64")
+        for m in metric_cols:
+            out[f"Δ {m}"] = merged[f"{m}_new"] - merged[f"{m}_old"]
+        self.frame = out
+
+        both = out[out["status"] == "both"]
+        order = np.lexsort((-both["rank_change"].to_numpy(dtype=np.int64), both["segment"].to_numpy(dtype=str)))
+        sorted_pos = both.index.to_numpy()[order]
+        segments = both["segment"].to_numpy(dtype=str)[order]
+        self._by_segment: dict[str, np.ndarray] = {}
+        if len(segments):
+            uniq, starts = np.unique(segments, return_index=True)
+            for seg, a, b in zip(uniq, starts, np.append(starts[1:], len(segments))):
+                self._by_segment[seg] = sorted_pos[a:b]
+        all_order = np.argsort(-both["rank_change"].to_numpy(dtype=np.int64), kind="stable")
+        self._all = both.index.to_numpy()[all_order]
+
+    @staticmethod
+    def _prepare(frame: pd.DataFrame, metric_cols: list[str]) -> pd.DataFrame:
+        out = frame[["driver_id", "segment", "rank", "drivers_score", *metric_cols]].copy()
+        out["driver_id"] = out["driver_id"].astype(str)
+        out["segment"] = out["segment"].astype(str)
+        ranks = pd.to_numeric(out["rank"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        totals = out.groupby("segment", sort=False)["segment"].transform("size").to_numpy(dtype=np.int64)
+        out["rank"] = ranks
+        out["tier"] = eligibility_tiers(ranks, totals)
+        return out
+
+    @property
+    def segments(self) -> list[str]:
+        return sorted(self.frame["segment"].unique().tolist())
+
+    def _rows(self, segment: str | None) -> pd.DataFrame:
+        return self.frame if segment is None else self.frame[self.frame["segment"].to_numpy() == segment]
+
+    def movers(self, segment: str | None = None, n: int = 10) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """(biggest rank gains, biggest rank drops) among couriers present in both months."""
+        order = self._all if segment is None else self._by_segment.get(segment, np.empty(0, dtype=np.int64))
+        up = self.frame.loc[order[:n]]
+        down = self.frame.loc[order[::-1][:n]]
+        return up[up["rank_change"] > 0], down[down["rank_change"] < 0]
+
+    def tier_changes(self, segment: str | None = None) -> pd.DataFrame:
+        """Couriers whose tier changed, biggest drops first (those call support first)."""
+        rows = self._rows(segment)
+        rows = rows[rows["tier_move"].fillna(0).to_numpy() != 0]
+        return rows.sort_values(["tier_move", "rank_change"], kind="stable")
+
+    def transitions(self, segment: str | None = None) -> pd.DataFrame:
+        """Courier counts tier_old (rows) × tier_new (columns), including arrivals ("") and departures."""
+        rows = self._rows(segment)
+        return pd.crosstab(rows["tier_old"], rows["tier_new"])
+
+    def counts(self, segment: str | None = None) -> dict[str, int]:
+        rows = self._rows(segment)
+        move = rows["tier_move"].fillna(0).to_numpy()
+        status = rows["status"].to_numpy()
+        return {
+            "up": int((move > 0).sum()),
+            "down": int((move < 0).sum()),
+            "new": int((status == "new").sum()),
+            "left": int((status == "left").sum()),
+        }
+
+
+# -----------------------------------------------------------------------------
+# Shared dataset
+# -----------------------------------------------------------------------------
+
+# Seconds between stat() checks of the data source by the background watcher
+WATCH_INTERVAL = 5
+# A page waits this long for the first load of a fresh process, then shows a placeholder that polls for it
+FIRST_LOAD_WAIT = 2
+LOADING_POLL_INTERVAL = 1
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """One data version with everything derived from it, built once and shared read-only by all sessions.
+    Never mutate frame or the indexes; a new version replaces the whole object."""
+
+    version: str
+    frame: pd.DataFrame
+    metric_cols: list[str]
+    benchmarks: dict[str, dict[str, dict[str, float]]]
+    cohorts: BenchmarkCube
+    search: SearchIndex
+    drivers: DriverIndex
+    insights: InsightTable
+    ladder: SegmentLadder
+    leaderboard: SegmentLeaderboard
+    model: ScoreModel
+    built_at: float
+
+    def lazy_columns(self, columns: list[str] = LAZY_COLUMNS) -> pd.DataFrame:
+        """Columns left out of the in-memory frame (e.g. contact_email), read from the snapshot on demand."""
+        return read_lazy_columns(self.version, columns, self.frame.attrs.get("parts"))
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, version: str | None = None) -> Dataset:
+        version = version or frame.attrs.get("data_version") or ""
+        t0 = time.perf_counter()
+        metric_cols = get_metric_columns_in_df(frame)
+        benchmarks = compute_benchmarks_per_sheet(frame)
+        drivers = DriverIndex(frame)
+        ladder = SegmentLadder(frame, metric_cols)
+        ds = cls(
+            version=version,
+            frame=frame,
+            metric_cols=metric_cols,
+            benchmarks=benchmarks,
+            cohorts=BenchmarkCube(frame),
+            search=SearchIndex(frame),
+            drivers=drivers,
+            insights=InsightTable(frame, benchmarks, metric_cols),
+            ladder=ladder,
+            leaderboard=SegmentLeaderboard(frame, drivers, ladder, metric_cols),
+            model=ScoreModel(frame, drivers, ladder, metric_cols),
+            built_at=time.time(),
+        )
+        logger.info("dataset %s built in %.3f s (%d rows)", version[:12], time.perf_counter() - t0, len(frame))
+        return ds
+
+
+class DatasetStore:
+    """Process-wide holder of the current Dataset.
+
+    get() hands every session the same object (no per-session copies) and never re-parses once a dataset is
+    loaded. A background watcher stat()s the sources every watch_interval seconds; when mtime/size change and the
+    content hash differs, it builds the new Dataset off the request path and swaps it in with a single reference
+    assignment, so readers see either the old or the new version, never a mix.
+    The watcher holds the store only weakly: a store that is dropped (st.cache_resource.clear(), a changed script)
+    is freed together with its Dataset, and its watcher ends.
+    """
+
+    def __init__(self, watch_interval: float = WATCH_INTERVAL):
+        self.watch_interval = watch_interval
+        self._current: Dataset | None = None
+        self._error: str | None = None
+        self._signature: tuple | None = None
+        self._parts: dict[str, tuple[str, pd.DataFrame]] = {}
+        self.source_errors: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._loaded = threading.Event()  # set once the first refresh finished (with or without data)
+        weakref.finalize(self, self._stop.set)
+        self.stats: Counter[str] = Counter()
+        self.last_load: dict[str, object] = {}
+        self.history: DriverHistory | None = None
+        self._history_signature: tuple | None = None
+
+    @property
+    def current(self) -> Dataset | None:
+        return self._current
+
+    def refresh(self) -> None:
+        """Re-read the sources (concurrently, see load_sources) and swap in a new Dataset if the content changed."""
+        try:
+            self._refresh()
+        finally:
+            self._loaded.set()
+
+    def _refresh(self) -> None:
+        with self._lock:
+            self.stats["refresh"] += 1
+            try:
+                sources = data_sources()
+            except ValueError as e:
+                self.stats["load_error"] += 1
+                self._error = f"Chybná konfigurace zdrojů dat: {e}"
+                return
+            signature = _source_signature(sources)
+            t0 = time.perf_counter()
+            loads = load_sources(sources, self._parts)
+            load_ms = (time.perf_counter() - t0) * 1000
+            self._signature = signature
+            self.source_errors = {load.source.name: load.error for load in loads if load.error}
+            good = [load for load in loads if load.frame is not None]
+            if not good:
+                self.stats["load_error"] += 1
+                errors = [f"{n}: {e}" if len(sources) > 1 else e for n, e in self.source_errors.items()]
+                self._error = " ".join(errors) or None
+                return
+            self._parts = {load.source.name: (load.version, load.frame) for load in good}
+            frame = merge_sources(good)
+            version = frame.attrs["data_version"]
+            if self._current is not None and self._current.version == version:
+                self.stats["unchanged"] += 1
+                return
+            for load in loads:
+                self.stats[f"{load.origin}_load"] += 1
+            t2 = time.perf_counter()
+            ds = Dataset.build(frame, version)
+            self.last_load = {
+                "version": version[:12],
+                "rows": len(frame),
+                "sources": {
+                    load.source.name: {
+                        "origin": load.origin,
+                        "version": (load.version or "")[:12],
+                        "rows": 0 if load.frame is None else len(load.frame),
+                        "ms": round(load.seconds * 1000, 2),
+                        **({"error": load.error} if load.error else {}),
+                    }
+                    for load in loads
+                },
+                "load_ms": round(load_ms, 2),
+                "build_ms": round((time.perf_counter() - t2) * 1000, 2),
+                "frame_mb": round(memory_report(frame)["total"] / 1e6, 2),
+                "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self.publish(ds)
+            _write_source_manifest({load.source.name: load.version for load in good if load.origin != "fallback"})
+            for load in good:  # keep the live snapshots newest, so pruning after the next write never hits them
+                try:
+                    os.utime(_snapshot_path(load.version))
+                except OSError:
+                    pass
+
+    def publish(self, ds: Dataset) -> None:
+        """Make ds the current dataset for all sessions (atomic reference swap)."""
+        self._current = ds
+        self._error = None
+
+    def poll(self) -> bool:
+        """One watcher step: refresh if the source signature changed. Returns True if it refreshed."""
+        try:
+            signature = _source_signature(data_sources())
+        except ValueError:
+            signature = None
+        if signature == self._signature and self._current is not None:
+            return False
+        self.refresh()
+        return True
+
+    def refresh_history(self) -> None:
+        """Ingest new/changed monthly workbooks and swap in the rebuilt DriverHistory."""
+        store = HistoryStore(EXCEL_PATH.parent)
+        signature = store.signature()
+        if signature == self._history_signature and self.history is not None:
+            return
+        store.sync()
+        history = store.load()
+        if len(history.months) >= 2:
+            history.diff(history.months[-2], history.months[-1])  # the default view, built off the request path
+        self.history = history
+        self._history_signature = signature
+
+    @staticmethod
+    def _watch(ref: weakref.ref[DatasetStore], stop: threading.Event, interval: float, load_now: bool) -> None:
+        """Watcher loop over a weak reference: it ends when the store is stopped or garbage-collected."""
+        wait = 0.0 if load_now else interval
+        while not stop.wait(wait):
+            wait = interval
+            store = ref()
+            if store is None:
+                return
+            try:
+                store.poll()
+                store.refresh_history()
+            except Exception:
+                logger.exception("data watcher failed; keeping the current dataset")
+            del store
+
+    def start_watcher(self, load_now: bool = False) -> None:
+        """Start the background watcher thread (idempotent). With load_now its first step runs right away, so the
+        first load happens off the request path as well."""
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch,
+                args=(weakref.ref(self), self._stop, self.watch_interval, load_now),
+                name="dataset-watcher",
+                daemon=True,
+            )
+            self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Stop the watcher thread after its current step."""
+        self._stop.set()
+
+    @property
+    def loading(self) -> bool:
+        """True while the watcher's first load is still running."""
+        return self._watcher is not None and self._watcher.is_alive() and not self._loaded.is_set()
+
+    def wait_loaded(self, timeout: float | None = None) -> bool:
+        """Wait up to timeout seconds for the first load to finish; True once it has (with or without data)."""
+        return self._loaded.wait(timeout)
+
+    def get(self) -> tuple[Dataset | None, str | None]:
+        """Current dataset and error hint. Without a background load in progress, loads synchronously while nothing
+        has been loaded yet (CLI tools); during the watcher's first load returns (None, None) right away."""
+        if self._current is None and not self.loading:
+            self.poll()
+        return self._current, None if self._current is not None else self._error
+
+
+# Rendered scorecards kept per (data version, driver_key, cohort level); one is ~15 kB of HTML
+SCORECARD_CACHE_SIZE = 1024
+
+
+class LRUCache:
+    """Small thread-safe LRU map with hit/miss counters. Keys include the data version, so entries of an older
+    version are never hit again and simply age out."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.stats["miss"] += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats["hit"] += 1
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+@st.cache_resource
+def scorecard_cache() -> LRUCache:
+    """Process-wide cache of rendered scorecard HTML, shared by all sessions like the dataset."""
+    return LRUCache(SCORECARD_CACHE_SIZE)
+
+
+@st.cache_resource
+def dataset_store() -> DatasetStore:
+    """The single DatasetStore of this server process (survives reruns and is shared by all sessions).
+    The first load runs on the watcher thread, so no request waits for a full parse: render_page shows a
+    placeholder until it finished (`python app.py` at deploy time makes that a snapshot read)."""
+    store = DatasetStore()
+    store.start_watcher(load_now=True)
+    return store
+
+
+def warm_up() -> None:
+    """Parse the workbook into the snapshot cache and build all indexes once, reporting the timings.
+    Run `python app.py` at deploy time so the server's first load reads the Parquet snapshot."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    t0 = time.perf_counter()
+    store = DatasetStore()
+    store.refresh()
+    store.refresh_history()
+    ds, error_hint = store.get()
+    if ds is None:
+        logger.error("warm-up failed: %s", error_hint or "no data source configured")
+        raise SystemExit(1)
+    logger.info("warm-up done in %.3f s: %d rows, version %s", time.perf_counter() - t0, len(ds.frame), ds.version[:12])
+
+
+def load_dataset() -> tuple[Dataset | None, str | None]:
+    """Current shared Dataset (loading it on first use). Returns (dataset, error_hint)."""
+    return dataset_store().get()
+
+
+def load_all_data() -> tuple[pd.DataFrame, str | None]:
+    """Load Excel from local path, EXCEL_URL / secrets or the configured sources (all merged). Returns (df, error_hint).
+    The frame is the shared, read-only frame of the current Dataset."""
+    ds, error_hint = load_dataset()
+    if ds is None:
+        return pd.DataFrame(), error_hint
+    return ds.frame, None
+
+
+# -----------------------------------------------------------------------------
+# Bulk lookup
+# -----------------------------------------------------------------------------
+
+BULK_MAX_ENTRIES = 5000
+BULK_COLUMNS = {
+    "input": "Zadáno",
+    "driver_id": "driver_id",
+    "full_name": "Jméno",
+    "segment": "Segment",
+    "rank": "Pořadí",
+    "total": "Kurýrů v segmentu",
+    "drivers_score": "Celkové hodnocení",
+    "eligibility": "Úroveň",
+    "strength_1": "Silná stránka 1",
+    "strength_2": "Silná stránka 2",
+    "focus_1": "Zlepšit 1",
+    "focus_2": "Zlepšit 2",
+    "focus_3": "Zlepšit 3",
+}
+# Columns of an uploaded CSV taken as the list, in order of preference (otherwise the first column)
+BULK_CSV_COLUMNS = ("driver_id", "full_name")
+
+
+def _read_bulk_csv(csv_data: bytes) -> list[str]:
+    """Values of an uploaded CSV: column driver_id, else full_name, else the first column. The first row is a header
+    only if it names one of those columns. A file with no , ; or tab on its first line is a single column and its
+    delimiter is not sniffed (the sniffer would take a digit of "100001" for one)."""
+    text = csv_data.decode("utf-8-sig")
+    if not text.strip():
+        return []
+    first_line = text.lstrip().split("\n", 1)[0]
+    sep = None if re.search(r"[,;\t]", first_line) else ","
+    df = pd.read_csv(io.StringIO(text), header=None, dtype=str, sep=sep, engine="python")
+    header = [str(v).strip().lower() for v in df.iloc[0]]
+    col = next((header.index(c) for c in BULK_CSV_COLUMNS if c in header), None)
+    if col is not None:
+        df = df.iloc[1:]
+    return df.iloc[:, col or 0].dropna().tolist()
+
+
+def parse_bulk_input(text: str | None = None, csv_data: bytes | None = None) -> list[str]:
+    """driver_ids / names from pasted text (one per line, or separated by , ;) and/or a CSV upload
+    (see _read_bulk_csv). Order kept, duplicates and blanks dropped."""
+    entries: list[str] = []
+    if text:
+        entries += re.split(r"[\n\r,;\t]+", text)
+    if csv_data:
+        entries += _read_bulk_csv(csv_data)
+    seen: set[str] = set()
+    out = []
+    for e in (e.strip() for e in entries):
+        if e and e not in seen:
+            seen.add(e)
+            out.append(e)
+    return out
+
+
+def bulk_lookup(ds: Dataset, entries: list[str]) -> pd.DataFrame:
+    """Resolve many driver_ids or full names at once: one join on driver_id (case-insensitive), then one join on the
+    diacritic-folded full name for entries that matched no ID. A courier listed in several segments gives several
+    rows; entries matching nothing give a row with empty fields. Columns: BULK_COLUMNS keys."""
+    queries = pd.DataFrame({"input": entries, "order": np.arange(len(entries))})
+    queries["id_key"] = [e.strip().lower() for e in entries]
+    queries["name_key"] = [_fold(e) for e in entries]
+    positions = np.arange(len(ds.frame))
+    by_id = queries.merge(pd.DataFrame({"id_key": ds.search.ids, "pos": positions}), on="id_key", how="inner")
+    rest = queries[~queries["order"].isin(by_id["order"])]
+    by_name = rest.merge(pd.DataFrame({"name_key": ds.search.names, "pos": positions}), on="name_key", how="inner")
+    hits = pd.concat([by_id, by_name], ignore_index=True).sort_values(["order", "pos"], kind="stable")
+    pos = hits["pos"].to_numpy(dtype=np.intp)
+
+    frame = ds.frame
+    found = pd.DataFrame(
+        {
+            "order": hits["order"].to_numpy(),
+            "input": hits["input"].to_numpy(),
+            "driver_id": frame["driver_id"].to_numpy(dtype=object)[pos] if "driver_id" in frame.columns else "",
+            "full_name": frame["full_name"].to_numpy()[pos] if "full_name" in frame.columns else "",
+            "segment": np.asarray(frame["segment"], dtype=object)[pos],
+            "rank": ds.drivers.ranks[pos],
+            "total": ds.drivers.totals[pos],
+            "drivers_score": frame["drivers_score"].to_numpy()[pos] if "drivers_score" in frame.columns else np.nan,
+            "eligibility": [ELIGIBILITY_LABELS.get(t, "—") for t in ds.drivers.tiers[pos]],
+        }
+    )
+    found = pd.concat([found, ds.insights.names_at(pos)], axis=1)
+    missing = queries[~queries["order"].isin(hits["order"])][["order", "input"]]
+    out = pd.concat([found, missing], ignore_index=True).sort_values("order", kind="stable")
+    out = out.reindex(columns=list(BULK_COLUMNS)).reset_index(drop=True)
+    return out.astype({"rank": "Int64", "total": "Int64"})
+
+
+def bulk_to_xlsx(table: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    table.to_excel(buf, index=False, sheet_name="Scorecards")
+    return buf.getvalue()
+
+
+# -----------------------------------------------------------------------------
+# Instrumentation
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class RerunTimings:
+    """Durations (ms) of the hot-path stages of one rerun plus cache hit/miss counters."""
+
+    stages: dict[str, float] = field(default_factory=dict)
+    counters: Counter[str] = field(default_factory=Counter)
+    started: float = field(default_factory=time.perf_counter)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t0) * 1000
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def record(self, **extra: object) -> dict[str, object]:
+        return {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages_ms": {k: round(v, 3) for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            **extra,
+        }
+
+
+@contextmanager
+def fragment_timings(scope: str):
+    """Timings for code inside an st.fragment: the enclosing full rerun's RerunTimings, or for a fragment-only
+    rerun (main() does not run) a fresh one that is logged on its own with this scope."""
+    outer = st.session_state.get("_rerun_timings")
+    if outer is not None:
+        yield outer
+        return
+    timings = RerunTimings()
+    try:
+        yield timings
+    finally:
+        ds = dataset_store().current
+        write_timing_log(
+            timings.record(
+                session=st.session_state.get("session_id"),
+                scope=scope,
+                data_version=ds.version[:12] if ds else None,
+                rows=len(ds.frame) if ds else 0,
+            )
+        )
+
+
+@st.cache_resource
+def _timing_log(path: Path) -> logging.Logger:
+    """One size-rotated JSON-lines logger per log file, shared by all sessions of the process."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=TIMING_LOG_MAX_BYTES, backupCount=TIMING_LOG_BACKUPS, encoding="utf-8", delay=True
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log = logging.getLogger(f"driver_score.timings.{hashlib.sha256(str(path).encode('utf-8')).hexdigest()[:12]}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    for old in log.handlers[:]:
+        log.removeHandler(old)
+        old.close()
+    log.addHandler(handler)
+    return log
+
+
+def write_timing_log(record: dict[str, object], path: Path | None = None) -> None:
+    """Append one JSON line to the timing log; logging problems never break the page."""
+    path = path or TIMING_LOG_PATH
+    try:
+        _timing_log(path).info(json.dumps(record, ensure_ascii=False))
+    except OSError as e:
+        logger.warning("could not write timing log %s: %s", path, e)
+
+
+def render_debug_panel(record: dict[str, object], store: DatasetStore) -> None:
+    """Admin-only diagnostics: this rerun's stage timings, cache counters and the loaded data version."""
+    with st.expander("Diagnostika (admin)", expanded=False):
+        st.markdown("**Tento rerun**")
+        st.json(record)
+        st.markdown("**Data a cache (celý proces)**")
+        st.json({"last_load": store.last_load, "store_stats": dict(store.stats)})
+        st.caption(f"Log časování: {TIMING_LOG_PATH}")
+
+
 # -----------------------------------------------------------------------------
 # UI
 # -----------------------------------------------------------------------------
@@ -367,7 +2320,15 @@ def _as_percentage(x: float) -> float:
     return x
 
 
-def render_metric_card(
+def _display_values(col: str, val: float, *bench: float) -> tuple[list[float], str]:
+    """Values as shown on the card: Delivery Quality is stored 0–1 in Excel and displayed as 0–100 %."""
+    vals = [val, *bench]
+    if col == "Delivery Quality":
+        return [_as_percentage(v) for v in vals], " %"
+    return vals, ""
+
+
+def metric_card_html(
     col: str,
     driver_val: float,
     p25: float,
@@ -375,9 +2336,11 @@ def render_metric_card(
     p75: float,
     *,
     value_suffix: str = "",
-) -> None:
+    percentile: float | None = None,
+) -> str:
     """One metric: name, courier vs median (above/below), and P25/P50/P75 bar with labels.
-    value_suffix: e.g. ' %' for percentage metrics (Delivery Quality) – display only, values stay as-is."""
+    value_suffix: e.g. ' %' for percentage metrics (Delivery Quality) – display only, values stay as-is.
+    percentile: courier's position in the segment (0–100), shown under the bar when given."""
     at_median = abs(driver_val - p50) < 0.005
     above_median = driver_val > p50 and not at_median
     pos_driver, pos_p25, pos_p50, pos_p75 = _scale_positions(driver_val, p25, p50, p75)
@@ -389,8 +2352,12 @@ def render_metric_card(
         status_class = "above" if above_median else "below"
         status_text = "Nad mediánem" if above_median else "Pod mediánem"
     suf = value_suffix
-    st.markdown(
-        f"""
+    pct_html = (
+        f'<div class="metric-vs" style="margin-top: 0.3rem;">Percentil v segmentu: <strong>{percentile:.0f}</strong></div>'
+        if percentile is not None
+        else ""
+    )
+    return f"""
         <div class="metric-card">
           <div class="metric-name">{col}</div>
           <div class="metric-vs">
@@ -408,12 +2375,188 @@ def render_metric_card(
             <span>Medián: {p50:.1f}{suf}</span>
             <span>P75: {p75:.1f}{suf}</span>
           </div>
+          {pct_html}
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
+
+
+def tier_gaps_html(gaps: list[TierGap]) -> str:
+    """How far the courier is from Top 20 % / Top 50 %: score at the cut-off, missing score, couriers to overtake."""
+    lines = []
+    for g in gaps:
+        if g.reached:
+            lines.append(f"<li><strong>{g.label}</strong> – splněno.</li>")
+        elif g.threshold_rank <= 0 or g.threshold_score is None:
+            lines.append(f"<li><strong>{g.label}</strong> – v segmentu je příliš málo kurýrů.</li>")
+        else:
+            gap = f"o {g.score_gap:.2f} víc" if g.score_gap else "skóre už stačí, rozhoduje pořadí"
+            lines.append(
+                f"<li><strong>{g.label}</strong> – potřeba pořadí {g.threshold_rank} nebo lepší; "
+                f"skóre na hranici {g.threshold_score:.2f} ({gap}); předběhnout {g.overtake} kurýrů.</li>"
+            )
+    return f'<ul class="metric-legend" style="color: var(--text-secondary);">{"".join(lines)}</ul>'
+
+
+def driver_header_html(
+    row: pd.Series, rank: int, total: int, elig_class: str, elig_label: str, pct_better: int, summary: str
+) -> str:
+    """Name, segment, ID, rank, drivers_score and eligibility badge of one courier."""
+    segment = row.get("segment", "")
+    return f"""
+        <div class="driver-card">
+          <div style="display: flex; flex-wrap: wrap; align-items: center; gap: 0.75rem;">
+            <span style="font-size: 1.25rem; font-weight: 600; color: #F0F2F5;">{row.get('full_name', '—')}</span>
+            <span class="segment-badge">{segment}</span>
+            <span style="color: #95A3B6;">ID: {row.get('driver_id', '—')}</span>
+            <span style="color: #95A3B6;">Pořadí: {rank} / {total} (segment {segment})</span>
+            <span style="font-weight: 600; color: #009414;">Celkové hodnocení kurýra: {row.get('drivers_score', '—')}</span>
+            <span class="segment-badge eligibility-{elig_class}">{elig_label}</span>
+            <span style="color: var(--text-tertiary); font-size: 0.9rem;">Lepší než {pct_better} % kurýrů v segmentu</span>
+          </div>
+          <p style="margin: 0.75rem 0 0; color: var(--text-secondary); font-size: 0.9rem;">{summary}</p>
+        </div>
+        """
+
+
+def scorecard_summary(elig_label: str, strengths: list, focus: list) -> str:
+    parts = [elig_label + "."]
+    if strengths:
+        parts.append(f"Nejsilnější v {strengths[0][0]}.")
+    if focus:
+        parts.append(f"Zlepšit: {focus[0][0]}.")
+    return " ".join(parts)
+
+
+def insight_box_html(kind: str, name: str, v: float, d: dict) -> str:
+    """Strength / at-median / focus box for one metric; kind is "strength", "average" or "focus"."""
+    (v, p50, p75), suf = _display_values(name, v, d.get("p50", 0), d.get("p75", 0))
+    if kind == "strength":
+        title, nums = "Silná stránka", f"medián: {p50:.2f}{suf} (nad mediánem)"
+    elif kind == "average":
+        title, nums = "Průměrný výkon", f"medián: {p50:.2f}{suf} (na úrovni mediánu)"
+    else:
+        title, nums = "K zlepšení", f"medián: {p50:.2f}{suf} · lepší kvartil: {p75:.2f}{suf} (pod mediánem)"
+    why = f'<div class="insight-why">{WHY_IT_MATTERS.get(name, "")}</div>' if kind == "focus" else ""
+    return (
+        f'<div class="insight-box insight-{kind}">'
+        f'<div class="insight-title">{title}</div>'
+        f'<div class="insight-metric">{name}</div>'
+        f'<div class="insight-nums">Kurýr: <strong>{v:.2f}{suf}</strong> · {nums}</div>'
+        f'<div class="insight-text">{d.get("recommendation", "")}</div>'
+        f"{why}"
+        f"</div>"
     )
 
 
+# Scorecard sections below the metrics: (heading, insight kind, text when empty)
+INSIGHT_SECTIONS = [
+    ("Silné stránky", "strength", "Žádné výrazné silné stránky proti mediánu."),
+    ("Průměr (na úrovni mediánu)", "average", "Žádná metrika přesně na úrovni mediánu."),
+    ("Doporučení (na co se zaměřit)", "focus", "Všechny metriky na úrovni nebo nad mediánem."),
+]
+
+# Standalone page around scorecard_html (exports): dark background, centered
+EXPORT_CSS = """
+<style>
+  body { background: var(--bg-dark); margin: 0 auto; max-width: 1100px; padding: 1.5rem; }
+  h1 { color: #009414 !important; }
+</style>
+"""
+
+
+def scorecard_html(ds: Dataset, pos: int, level: str = "segment") -> str:
+    """The whole scorecard of the row at pos as one HTML block (styles: BRAND_CSS): header, tier gaps, metric cards
+    against the benchmarks of the chosen cohort level (COHORT_LEVELS) and the insight boxes. Built in one pass
+    without blank lines or indentation, so Markdown passes it through as a single raw HTML block."""
+    row = ds.frame.iloc[pos]
+    segment = row.get("segment", "")
+    benchmarks = ds.benchmarks.get(segment, {})
+    rank, total = int(ds.drivers.ranks[pos]), int(ds.drivers.totals[pos])
+    elig_class, elig_label = ds.drivers.eligibility(pos)
+    strengths, focus, at_median = ds.insights.insights_at(pos)
+    score = row.get("drivers_score")
+    gaps = ds.ladder.tier_gaps(segment, rank, None if pd.isna(score) else float(score), total)
+    metric_pcts = ds.ladder.metric_percentiles(segment, row)
+
+    parts = [
+        '<div class="scorecard">',
+        driver_header_html(
+            row, rank, total, elig_class, elig_label, int(ds.drivers.pct_better[pos]),
+            scorecard_summary(elig_label, strengths, focus),
+        ),
+        "<h4>Cesta k vyšší úrovni</h4>",
+        tier_gaps_html(gaps),
+        "<h4>Metriky: hodnota kurýra vs medián (P25, medián, P75)</h4>",
+    ]
+    if level != "segment":
+        wanted = BenchmarkCube.cohort_key(level, segment, row.get("working_city"), row.get("primary_ride_type"))
+        used, benchmarks, size = ds.cohorts.get(wanted)
+        note = (
+            ""
+            if used == wanted
+            else f" Skupina {BenchmarkCube.label(wanted)} má méně než {MIN_COHORT_SIZE} kurýrů, použita nadřazená."
+        )
+        parts.append(
+            f'<p class="metric-legend">Srovnání: {BenchmarkCube.label(used)} ({size} kurýrů).{note} '
+            "Percentil a doporučení jsou vždy v rámci segmentu.</p>"
+        )
+    parts.append(
+        '<p class="metric-legend">Pruh: zelená čára = medián, bílá čárka = kurýr, zelený pás = rozsah P25–P75.</p>'
+    )
+    if "drivers_score" in benchmarks:
+        b = benchmarks["drivers_score"]
+        val = float(score) if pd.notna(score) else 0
+        parts.append(metric_card_html("Celkové hodnocení kurýra", val, b.get("p25", 0), b.get("p50", 0), b.get("p75", 0)))
+    parts.append('<div class="metric-grid">')
+    for col in ds.metric_cols:
+        val = row.get(col)
+        b = benchmarks.get(col, {})
+        vals, suf = _display_values(col, float(val) if pd.notna(val) else 0, b.get("p25", 0), b.get("p50", 0), b.get("p75", 0))
+        parts.append(metric_card_html(col, *vals, value_suffix=suf, percentile=metric_pcts.get(col)))
+    parts.append("</div>")
+    parts.append(
+        '<p class="data-source-caption">Všechny metriky včetně „Delivery Quality“ pocházejí ze sloupců v souboru Excel (Priority Booking results). '
+        "„Delivery Quality“ = sloupec v exportu (hodnoty 0–1 se zobrazí jako 0–100 %). Pokud sloupec chybí nebo je prázdný, zobrazí se 0.</p>"
+    )
+    insights = {"strength": strengths, "average": at_median, "focus": focus}
+    for heading, kind, empty in INSIGHT_SECTIONS:
+        items = insights[kind]
+        parts.append(f"<h4>{heading}</h4>")
+        parts += [insight_box_html(kind, name, v, d) for name, v, d in items] or [f'<p class="metric-legend">{empty}</p>']
+    parts.append("</div>")
+    return "\n".join(line.strip() for part in parts for line in part.splitlines() if line.strip())
+
+
+def scorecard_document(ds: Dataset, pos: int) -> str:
+    """Standalone HTML page with the scorecard of the row at pos (for e-mail / PDF export)."""
+    row = ds.frame.iloc[pos]
+    return (
+        '<!DOCTYPE html>\n<html lang="cs"><head><meta charset="utf-8">'
+        f"<title>Driver Scorecard – {row.get('full_name', '')}</title>{BRAND_CSS}{EXPORT_CSS}</head>"
+        '<body><h1>grid.online Driver Scorecard</h1>'
+        f"{scorecard_html(ds, pos)}"
+        f'<p class="data-source-caption">Data: {ds.version[:12]}</p></body></html>\n'
+    )
+
+
+def render_trend(trend: pd.DataFrame, metric_cols: list[str]) -> None:
+    """Month-by-month rank, drivers_score and metrics of one courier (from the history store)."""
+    st.markdown("#### Vývoj v čase")
+    if len(trend) < 2:
+        st.caption("Historie zatím obsahuje jen jeden měsíc tohoto kurýra.")
+        return
+    by_month = trend.set_index("month")
+    c1, c2 = st.columns(2)
+    with c1:
+        st.caption("Celkové hodnocení kurýra")
+        st.line_chart(by_month[["drivers_score"]])
+    with c2:
+        st.caption("Pořadí v segmentu (nižší = lepší)")
+        st.line_chart(by_month[["rank"]])
+    cols = ["rank", "drivers_score"] + [c for c in metric_cols if c in by_month.columns]
+    st.dataframe(by_month[cols].T)
+
+
 def main() -> None:
     st.set_page_config(page_title="Driver Scorecard | grid.online", layout="wide", initial_sidebar_state="collapsed")
 
@@ -425,17 +2568,242 @@ def main() -> None:
         col1, _ = st.columns([1, 3])
         with col1:
             if st.button("Přihlásit", type="primary"):
-                if pwd == APP_PASSWORD:
+                if pwd == APP_PASSWORD or (ADMIN_PASSWORD and pwd == ADMIN_PASSWORD):
                     st.session_state["authenticated"] = True
+                    st.session_state["is_admin"] = bool(ADMIN_PASSWORD) and pwd == ADMIN_PASSWORD
                     st.rerun()
                 else:
                     st.error("Nesprávné heslo.")
         st.stop()
 
+    timings = RerunTimings()
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex[:8])
+    st.session_state["_rerun_timings"] = timings  # fragments add their stages to this rerun (fragment_timings)
+    try:
+        render_page(timings)
+    finally:
+        del st.session_state["_rerun_timings"]
+        store = dataset_store()
+        ds = store.current
+        record = timings.record(
+            session=session_id,
+            data_version=ds.version[:12] if ds else None,
+            rows=len(ds.frame) if ds else 0,
+        )
+        write_timing_log(record)
+        if st.session_state.get("is_admin"):
+            render_debug_panel(record, store)
+
+
+def render_bulk_lookup(ds: Dataset, timings: RerunTimings) -> None:
+    """Pasted / uploaded list of driver_ids or names -> one table of scorecards with CSV and XLSX download."""
+    text = st.text_area(
+        "driver_id nebo jména (jeden na řádek, nebo oddělené čárkou)", key="bulk_text", height=150,
+        placeholder="1001\n1002\nJan Novák",
+    )
+    upload = st.file_uploader("…nebo CSV se sloupcem driver_id / full_name", type=["csv"], key="bulk_csv")
+    try:
+        entries = parse_bulk_input(text, upload.getvalue() if upload is not None else None)
+    except (ValueError, pd.errors.ParserError) as e:
+        st.error(f"CSV se nepodařilo načíst: {e}")
+        return
+    if not entries:
+        st.caption("Zadejte seznam kurýrů, výsledky se zobrazí v tabulce.")
+        return
+    if len(entries) > BULK_MAX_ENTRIES:
+        st.warning(f"Zpracuje se prvních {BULK_MAX_ENTRIES} z {len(entries)} položek.")
+        entries = entries[:BULK_MAX_ENTRIES]
+
+    with timings.stage("bulk_lookup"):
+        table = bulk_lookup(ds, entries)
+    timings.count("bulk_entries", len(entries))
+    missing = int(table["segment"].isna().sum())
+    st.caption(f"Zadáno {len(entries)}, nalezeno {len(table) - missing} řádků, nenalezeno {missing}.")
+    shown = table.rename(columns=BULK_COLUMNS)
+    st.dataframe(shown, hide_index=True)
+    c1, c2 = st.columns(2)
+    c1.download_button(
+        "Stáhnout CSV", shown.to_csv(index=False).encode("utf-8-sig"), "scorecards.csv", "text/csv", key="bulk_dl_csv"
+    )
+    c2.download_button(
+        "Stáhnout XLSX", bulk_to_xlsx(shown), "scorecards.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="bulk_dl_xlsx",
+    )
+
+
+LEADERBOARD_PAGE_SIZES = [25, 50, 100, 200]
+LEADERBOARD_COLUMNS = {"rank": "Pořadí", "full_name": "Jméno", "driver_id": "driver_id", "working_city": "Město"}
+
+
+@st.fragment
+def render_leaderboard() -> None:
+    """Rank table of one segment, paged / sorted / filtered on the server from the presorted SegmentLeaderboard,
+    plus fixed-bin histograms; only the visible page and the bins are sent to the browser. Paging reruns only
+    this fragment."""
+    with fragment_timings("leaderboard") as timings:
+        ds, _ = load_dataset()
+        if ds is None:
+            return
+        lb = ds.leaderboard
+        segments = sorted(lb.orders)
+        c1, c2, c3, c4 = st.columns([2, 2, 1, 1])
+        segment = c1.selectbox("Segment", segments, key="lb_segment")
+        sort = c2.selectbox(
+            "Řadit podle", lb.sort_columns, format_func=lambda c: LEADERBOARD_COLUMNS.get(c, c), key="lb_sort"
+        )
+        descending = c3.toggle("Sestupně", value=sort not in ("rank", "full_name"), key=f"lb_desc_{sort}")
+        size = c4.selectbox("Na stránku", LEADERBOARD_PAGE_SIZES, index=1, key="lb_size")
+
+        f1, f2, f3 = st.columns(3)
+        tiers = f1.multiselect(
+            "Úroveň", list(ELIGIBILITY_LABELS), format_func=ELIGIBILITY_LABELS.get, key="lb_tiers"
+        )
+        cities = ["Všechna města", *lb.cities.get(segment, [])]
+        city = f2.selectbox("Město", cities, key="lb_city")
+        name = f3.text_input("Jméno nebo ID obsahuje", key="lb_name")
+
+        with timings.stage("leaderboard"):
+            matches = lb.rows(
+                segment,
+                sort,
+                descending,
+                city=None if city == cities[0] else city,
+                tiers=tiers,
+                within=ds.search.search(name) if name else None,
+            )
+            pages = max(1, -(-len(matches) // size))
+            if st.session_state.setdefault("lb_page", 1) > pages:
+                st.session_state["lb_page"] = pages  # filters narrowed the result
+            page = st.number_input(f"Stránka (z {pages})", min_value=1, max_value=pages, key="lb_page") - 1
+            positions = matches[page * size : (page + 1) * size]
+
+            frame = ds.frame
+            cols = [c for c in ["full_name", "driver_id", "working_city", "drivers_score", *ds.metric_cols] if c in frame.columns]
+            table = frame.iloc[positions][cols].reset_index(drop=True)
+            table.insert(0, "rank", ds.drivers.ranks[positions])
+            table["Úroveň"] = [ELIGIBILITY_LABELS.get(t, "—") for t in ds.drivers.tiers[positions]]
+        timings.count("leaderboard_rows", len(positions))
+        st.caption(
+            f"Zobrazeno {page * size + min(1, len(positions))}–{page * size + len(positions)} z {len(matches)} "
+            f"(segment má {ds.drivers.segment_sizes.get(segment, 0)} kurýrů)."
+        )
+        st.dataframe(table.rename(columns=LEADERBOARD_COLUMNS), hide_index=True)
+
+        st.markdown("#### Rozložení v segmentu")
+        histograms = lb.histograms.get(segment, {})
+        if not histograms:
+            return
+        metric = st.selectbox(
+            "Metrika", list(histograms), format_func=lambda c: "Celkové hodnocení kurýra" if c == "drivers_score" else c,
+            key="lb_metric",
+        )
+        st.bar_chart(histograms[metric].to_frame())
+        if metric == "drivers_score":
+            cut = lb.cutoffs.get(segment, {})
+            st.caption(
+                " · ".join(f"{ELIGIBILITY_LABELS[t]}: skóre od {v:.2f}" for t, v in cut.items() if v is not None)
+                or "V segmentu je příliš málo kurýrů pro hranice úrovní."
+            )
+
+
+MONTH_DIFF_COLUMNS = {
+    "full_name": "Jméno",
+    "driver_id": "driver_id",
+    "segment": "Segment",
+    "rank_old": "Pořadí dříve",
+    "rank_new": "Pořadí nyní",
+    "rank_change": "Posun",
+    "score_change": "Změna skóre",
+    "tier_old": "Úroveň dříve",
+    "tier_new": "Úroveň nyní",
+}
+
+
+def _month_diff_table(ds: Dataset, rows: pd.DataFrame) -> pd.DataFrame:
+    """Diff rows for display: names from the current dataset, Czech headers, tier labels."""
+    names = ds.frame["full_name"].to_numpy(dtype=object) if "full_name" in ds.frame.columns else None
+    out = rows.copy()
+    out["full_name"] = [
+        names[ds.drivers.positions[k]] if names is not None and k in ds.drivers.positions else "—"
+        for k in rows["driver_key"].tolist()
+    ]
+    for col in ("tier_old", "tier_new"):
+        out[col] = out[col].map(lambda t: ELIGIBILITY_LABELS.get(t, "—"))
+    return out[list(MONTH_DIFF_COLUMNS)].rename(columns=MONTH_DIFF_COLUMNS)
+
+
+def render_month_diff(ds: Dataset, timings: RerunTimings) -> None:
+    """Who moved between tiers and the biggest rank movers between two months of the history store."""
+    history = dataset_store().history
+    if history is None or len(history.months) < 2:
+        st.info("Pro srovnání jsou potřeba alespoň dva měsíce v historii (starší exporty ve složce `data/`, viz README).")
+        return
+    months = history.months
+    c1, c2, c3 = st.columns(3)
+    old = c1.selectbox("Předchozí měsíc", months, index=len(months) - 2, key="diff_old")
+    new = c2.selectbox("Nový měsíc", months, index=len(months) - 1, key="diff_new")
+    if old == new:
+        st.warning("Vyberte dva různé měsíce.")
+        return
+    with timings.stage("month_diff"):
+        diff = history.diff(old, new)
+    choice = c3.selectbox("Segment", ["Všechny segmenty"] + diff.segments, key="diff_segment")
+    segment = None if choice == "Všechny segmenty" else choice
+
+    counts = diff.counts(segment)
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Lepší úroveň", counts["up"])
+    m2.metric("Horší úroveň", counts["down"])
+    m3.metric("Noví", counts["new"])
+    m4.metric("Chybí v novém měsíci", counts["left"])
+
+    st.markdown("#### Přechody mezi úrovněmi (řádky: dříve, sloupce: nyní)")
+    labels = {**ELIGIBILITY_LABELS, "": "Nebyl v měsíci"}
+    st.dataframe(diff.transitions(segment).rename(index=labels, columns=labels))
+
+    st.markdown("#### Změna úrovně (nejdřív zhoršení)")
+    changes = diff.tier_changes(segment)
+    st.dataframe(_month_diff_table(ds, changes.head(500)), hide_index=True)
+    if len(changes) > 500:
+        st.caption(f"Zobrazeno 500 z {len(changes)}; všechny jsou v CSV níže.")
+
+    up, down = diff.movers(segment)
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown("#### Největší posun nahoru")
+        st.dataframe(_month_diff_table(ds, up), hide_index=True)
+    with c2:
+        st.markdown("#### Největší propad")
+        st.dataframe(_month_diff_table(ds, down), hide_index=True)
+
+    rows = diff.frame if segment is None else diff.frame[diff.frame["segment"] == segment]
+    st.download_button(
+        "Stáhnout všechny změny (CSV)", rows.to_csv(index=False).encode("utf-8-sig"), f"zmeny-{old}-{new}.csv",
+        "text/csv", key="diff_dl",
+    )
+
+
+@st.fragment(run_every=LOADING_POLL_INTERVAL)
+def render_loading() -> None:
+    """Placeholder while the first data load runs in the background; reruns the whole page once it finished."""
+    if dataset_store().loading:
+        st.info("Načítám data… Stránka se zobrazí, jakmile budou připravená.")
+    else:
+        st.rerun()
+
+
+def render_page(timings: RerunTimings) -> None:
+    """Search and scorecard for a logged-in agent; stage durations go to timings."""
     apply_brand()
 
-    all_data, data_error = load_all_data()
-    if all_data.empty:
+    store = dataset_store()
+    if not store.wait_loaded(FIRST_LOAD_WAIT):
+        render_loading()
+        return
+    timings.count("dataset_hit" if store.current is not None else "dataset_miss")
+    with timings.stage("load_all_data"):
+        ds, data_error = load_dataset()
+    if ds is None:
         msg = (
             "Data nenalezena. Lokálně: umístěte **Priority Booking 02-26 results.xlsx** do složky `data/`. "
             "Při nasazení: v Secrets nastavte **excel_url** (nebo env **EXCEL_URL**) na odkaz na soubor nebo Google Sheets."
@@ -443,192 +2811,186 @@ def main() -> None:
         if data_error:
             msg += f" Detaily: {data_error}"
         st.warning(msg)
-        st.stop()
+        return
 
-    benchmarks_by_sheet = compute_benchmarks_per_sheet(all_data)
-    metric_cols = get_metric_columns_in_df(all_data)
+    for name, error in dataset_store().source_errors.items():
+        st.warning(
+            f"Zdroj dat **{name}** se nepodařilo načíst ({error}); "
+            "jeho segmenty ukazují poslední funkční data, pokud existují."
+        )
 
+    mode = st.radio(
+        "Režim", ["Jeden kurýr", "Hromadné vyhledání", "Změny mezi měsíci", "Žebříček segmentu"], horizontal=True,
+        key="mode", label_visibility="collapsed",
+    )
+    if mode == "Žebříček segmentu":
+        render_leaderboard()
+        return
+    if mode == "Hromadné vyhledání":
+        render_bulk_lookup(ds, timings)
+        return
+    if mode == "Změny mezi měsíci":
+        render_month_diff(ds, timings)
+        return
+
+    render_search()
+    render_scorecard()
+
+
+@st.fragment
+def render_search() -> None:
+    """Search box and result picker. A keystroke reruns only this fragment; the page (and so the scorecard fragment)
+    is rerun only when the courier to show changes. Publishes that courier as st.session_state["scorecard_key"]."""
+    with fragment_timings("search") as timings:
+        shown_key = _search_and_pick(timings)
+        changed = shown_key != st.session_state.get("scorecard_key")
+        st.session_state["scorecard_key"] = shown_key
+    if changed and st.session_state.get("_rerun_timings") is None:
+        st.rerun()  # fragment-only rerun: the scorecard fragment cannot be redrawn from here
+
+
+def _search_and_pick(timings: RerunTimings) -> str | None:
+    """driver_key of the courier to show for the current query (None: nothing found / nothing typed)."""
+    ds, _ = load_dataset()
+    if ds is None:
+        return None
     query = st.text_input("Hledat kurýra (jméno nebo driver_id)", placeholder="Příjmení nebo ID…", key="search")
     selected_key = st.session_state.get("selected_driver_key")
 
-    matches = search_drivers(all_data, query) if query else pd.DataFrame()
-
-    if matches.empty and query:
+    index = ds.search
+    with timings.stage("search_drivers"):
+        positions = index.search(query) if query else np.empty(0, dtype=np.intp)
+        fuzzy_match = False
+        if len(positions) == 0 and query:
+            # No exact/partial match: offer the closest names (typos, missing diacritics)
+            positions = index.fuzzy(query)
+            fuzzy_match = len(positions) > 0
+            timings.count("fuzzy_search")
+    timings.count("search_results", len(positions))
+
+    if len(positions) == 0 and query:
         st.info("Kurýr nebyl nalezen. Buď je špatně napsáno příjmení/ID, nebo kurýr neodjel dostatek jízd pro vyhodnocení.")
         if selected_key:
             del st.session_state["selected_driver_key"]
-        st.stop()
+        return None
 
     if not query:
         if selected_key:
             del st.session_state["selected_driver_key"]
         st.info("Zadejte jméno nebo driver_id pro vyhledání.")
-        st.stop()
-
-    if len(matches) == 1:
-        selected = matches.iloc[0]
-        selected_key = None
-    else:
-        def driver_key(r: pd.Series) -> str:
-            return f"{r.get('driver_id', '')}|{r.get('segment', '')}"
-        match_keys = [driver_key(matches.iloc[i]) for i in range(len(matches))]
-        if selected_key and selected_key in match_keys:
-            idx = match_keys.index(selected_key)
-            selected = matches.iloc[idx]
-        else:
-            options = [
-                f"{row.get('full_name', '—')} | {row.get('driver_id', '—')} | {row.get('working_city', '—')} | {row.get('segment', '—')}"
-                for _, row in matches.iterrows()
-            ]
-            choice = st.selectbox(
-                "Vyberte kurýra",
-                range(len(options)),
-                format_func=lambda i: options[i],
-                key="driver_select",
-            )
-            selected = matches.iloc[choice]
-            selected_key = driver_key(selected)
-        st.session_state["selected_driver_key"] = selected_key
-
-    segment = selected.get("segment", "")
-    benchmarks = benchmarks_by_sheet.get(segment, {})
-    total_in_segment = int(all_data[all_data["segment"] == segment].shape[0])
-    rank = int(selected.get("rank", 0))
-    elig_class, elig_label = get_eligibility(rank, total_in_segment)
-
-    strengths, focus, at_median = get_insights(selected, benchmarks, metric_cols)
-
-    # One-line summary
-    summary_parts = [elig_label + "."]
-    if strengths:
-        summary_parts.append(f"Nejsilnější v {strengths[0][0]}.")
-    if focus:
-        summary_parts.append(f"Zlepšit: {focus[0][0]}.")
-    one_line_summary = " ".join(summary_parts)
-
-    # Percentile: better than X% of drivers in segment (rank 1 = best)
-    pct_better = round((total_in_segment - rank) / total_in_segment * 100) if total_in_segment > 0 else 0
-
-    st.markdown("---")
-    st.markdown(
-        f"""
-        <div class="driver-card">
-          <div style="display: flex; flex-wrap: wrap; align-items: center; gap: 0.75rem;">
-            <span style="font-size: 1.25rem; font-weight: 600; color: #F0F2F5;">{selected.get('full_name', '—')}</span>
-            <span class="segment-badge">{segment}</span>
-            <span style="color: #95A3B6;">ID: {selected.get('driver_id', '—')}</span>
-            <span style="color: #95A3B6;">Pořadí: {rank} / {total_in_segment} (segment {segment})</span>
-            <span style="font-weight: 600; color: #009414;">Celkové hodnocení kurýra: {selected.get('drivers_score', '—')}</span>
-            <span class="segment-badge eligibility-{elig_class}">{elig_label}</span>
-            <span style="color: var(--text-tertiary); font-size: 0.9rem;">Lepší než {pct_better} % kurýrů v segmentu</span>
-          </div>
-          <p style="margin: 0.75rem 0 0; color: var(--text-secondary); font-size: 0.9rem;">{one_line_summary}</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    st.markdown("#### Metriky: hodnota kurýra vs medián (P25, medián, P75)")
-    st.markdown(
-        '<p class="metric-legend">Pruh: zelená čára = medián, bílá čárka = kurýr, zelený pás = rozsah P25–P75.</p>',
-        unsafe_allow_html=True,
-    )
-    # Celkové hodnocení kurýra (drivers_score) on a single full-width line
-    if "drivers_score" in benchmarks:
-        b = benchmarks.get("drivers_score", {})
-        val_f = float(selected.get("drivers_score", 0)) if pd.notna(selected.get("drivers_score")) else 0
-        render_metric_card("Celkové hodnocení kurýra", val_f, b.get("p25", 0), b.get("p50", 0), b.get("p75", 0))
-    # Additional metrics: two rows of three boxes
-    chunk_size = 3
-    for i in range(0, len(metric_cols), chunk_size):
-        chunk = metric_cols[i : i + chunk_size]
-        cols = st.columns(len(chunk))
-        for j, col_name in enumerate(chunk):
-            val = selected.get(col_name)
-            b = benchmarks.get(col_name, {})
-            p25 = b.get("p25", 0)
-            p50 = b.get("p50", 0)
-            p75 = b.get("p75", 0)
-            val_f = float(val) if pd.notna(val) else 0
-            with cols[j]:
-                if col_name == "Delivery Quality":
-                    # Excel stores 0–1 decimal (e.g. 0.85 = 85%); convert to 0–100 for display
-                    val_f = _as_percentage(val_f)
-                    p25, p50, p75 = _as_percentage(p25), _as_percentage(p50), _as_percentage(p75)
-                    render_metric_card(col_name, val_f, p25, p50, p75, value_suffix=" %")
-                else:
-                    render_metric_card(col_name, val_f, p25, p50, p75)
-    st.markdown(
-        '<p class="data-source-caption">Všechny metriky včetně „Delivery Quality“ pocházejí ze sloupců v souboru Excel (Priority Booking results). '
-        '„Delivery Quality“ = sloupec v exportu (hodnoty 0–1 se zobrazí jako 0–100 %). Pokud sloupec chybí nebo je prázdný, zobrazí se 0.</p>',
-        unsafe_allow_html=True,
+        return None
+
+    if fuzzy_match:
+        st.caption("Přesná shoda nenalezena – zobrazujeme nejpodobnější jména.")
+
+    drivers = ds.drivers
+    if len(positions) == 1 and not fuzzy_match:
+        return drivers.keys[int(positions[0])]
+    # Options are driver_keys, so a pick survives refining the query; a courier picked earlier stays preselected
+    keys = [drivers.keys[p] for p in positions.tolist()]
+    selected_key = st.selectbox(
+        "Vyberte kurýra",
+        keys,
+        index=keys.index(selected_key) if selected_key in keys else 0,
+        format_func=lambda k: drivers.labels[drivers.positions[k]],
+        key="driver_select",
     )
+    st.session_state["selected_driver_key"] = selected_key
+    return selected_key
+
+
+def render_what_if(ds: Dataset, pos: int, key: str) -> None:
+    """Expander with the courier's metrics as inputs; any edit shows the score, rank and tier ds.model predicts.
+    Inputs start at the courier's values (Delivery Quality in %, a missing metric at the segment mean)."""
+    row = ds.frame.iloc[pos]
+    segment = _cell_str(row.get("segment"))
+    fit = ds.model.fit(segment)
+    with st.expander("Co kdyby… (simulace skóre a pořadí)"):
+        if fit is None:
+            st.caption("Segment nemá dost kurýrů se všemi metrikami, simulace není k dispozici.")
+            return
+        st.caption(
+            f"Odhad podle lineárního modelu skóre z metrik segmentu (R² = {fit.r2:.2f}, typická odchylka "
+            f"± {fit.rmse:.2f}, {fit.n} kurýrů). Upravte metriky, na kterých chce kurýr zapracovat."
+        )
+        if fit.r2 < WHAT_IF_MIN_R2:
+            st.warning("Model vysvětluje jen malou část skóre; výsledek berte jako hrubý odhad.")
+        inputs: list[tuple[str, str, float, float]] = []  # (column, widget key, start value as shown, scale)
+        for i, col in enumerate(fit.columns):
+            value = float(row.get(col, np.nan))
+            value = float(fit.means[i]) if np.isnan(value) else value
+            scale = 100.0 if col == "Delivery Quality" and 0 <= value <= 1 else 1.0
+            inputs.append((col, f"whatif|{key}|{col}", round(value * scale, 2), scale))
+
+        def reset() -> None:
+            for _, widget, start, _ in inputs:
+                st.session_state[widget] = start
+
+        changes: dict[str, float] = {}
+        grid = st.columns(2)
+        for i, (col, widget, start, scale) in enumerate(inputs):
+            st.session_state.setdefault(widget, start)
+            with grid[i % 2]:
+                label = f"{col} (%)" if scale != 1 else col
+                value = st.number_input(label, key=widget, step=0.1 * scale, format="%.2f")
+            if value != start:
+                changes[col] = value / scale
+        st.button("Vrátit skutečné hodnoty", on_click=reset, key=f"whatif_reset|{key}")
+
+        w = ds.model.simulate(pos, segment, changes)
+        c1, c2, c3 = st.columns(3)
+        c1.metric(
+            "Odhad skóre", f"{w.predicted_score:.2f}",
+            delta=f"{w.predicted_score - w.score:+.2f}" if w.score is not None and changes else None,
+        )
+        c2.metric(
+            "Pořadí", f"{w.new_rank} / {w.total}",
+            delta=f"{w.rank - w.new_rank:+d} míst" if changes and w.rank != w.new_rank else None,
+        )
+        c3.metric("Úroveň", w.label.split(":")[0])
+
+
+@st.fragment
+def render_scorecard() -> None:
+    """Scorecard of st.session_state["scorecard_key"]: one HTML block, rendered once per (data version, driver_key,
+    cohort level) into the shared scorecard_cache, plus the history trend. Changing the cohort reruns only this
+    fragment; search keystrokes that keep the same courier do not touch it."""
+    key = st.session_state.get("scorecard_key")
+    if not key:
+        return
+    with fragment_timings("scorecard") as timings:
+        ds, _ = load_dataset()
+        pos = ds.drivers.positions.get(key) if ds is not None else None
+        if pos is None:
+            return
+        st.markdown("---")
+        level = st.radio(
+            "Porovnat s", list(COHORT_LEVELS), format_func=COHORT_LABELS.get, horizontal=True, key="cohort_level"
+        )
+        cache = scorecard_cache()
+        cache_key = (ds.version, key, level)
+        html = cache.get(cache_key)
+        if html is None:
+            timings.count("scorecard_cache_miss")
+            with timings.stage("scorecard_html"):
+                html = scorecard_html(ds, pos, level)
+            cache.put(cache_key, html)
+        else:
+            timings.count("scorecard_cache_hit")
+        with timings.stage("render"):
+            st.markdown(html, unsafe_allow_html=True)
 
-    st.markdown("#### Silné stránky")
-    if strengths:
-        for name, v, d in strengths:
-            p50 = d.get("p50", 0)
-            if name == "Delivery Quality":
-                v, p50 = _as_percentage(v), _as_percentage(p50)
-                suf = " %"
-            else:
-                suf = ""
-            st.markdown(
-                f'<div class="insight-box insight-strength">'
-                f'<div class="insight-title">Silná stránka</div>'
-                f'<div class="insight-metric">{name}</div>'
-                f'<div class="insight-nums">Kurýr: <strong>{v:.2f}{suf}</strong> · medián: {p50:.2f}{suf} (nad mediánem)</div>'
-                f'<div class="insight-text">{d.get("recommendation", "")}</div>'
-                f"</div>",
-                unsafe_allow_html=True,
-            )
-    else:
-        st.caption("Žádné výrazné silné stránky proti mediánu.")
-
-    st.markdown("#### Průměr (na úrovni mediánu)")
-    if at_median:
-        for name, v, d in at_median:
-            p50 = d.get("p50", 0)
-            if name == "Delivery Quality":
-                v, p50 = _as_percentage(v), _as_percentage(p50)
-                suf = " %"
-            else:
-                suf = ""
-            st.markdown(
-                f'<div class="insight-box insight-average">'
-                f'<div class="insight-title">Průměrný výkon</div>'
-                f'<div class="insight-metric">{name}</div>'
-                f'<div class="insight-nums">Kurýr: <strong>{v:.2f}{suf}</strong> · medián: {p50:.2f}{suf} (na úrovni mediánu)</div>'
-                f'<div class="insight-text">{d.get("recommendation", "")}</div>'
-                f"</div>",
-                unsafe_allow_html=True,
-            )
-    else:
-        st.caption("Žádná metrika přesně na úrovni mediánu.")
+        with timings.stage("what_if"):
+            render_what_if(ds, pos, key)
 
-    st.markdown("#### Doporučení (na co se zaměřit)")
-    if focus:
-        for name, v, d in focus:
-            p50 = d.get("p50", 0)
-            p75 = d.get("p75", 0)
-            why = WHY_IT_MATTERS.get(name, "")
-            if name == "Delivery Quality":
-                v, p50, p75 = _as_percentage(v), _as_percentage(p50), _as_percentage(p75)
-                suf = " %"
-            else:
-                suf = ""
-            st.markdown(
-                f'<div class="insight-box insight-focus">'
-                f'<div class="insight-title">K zlepšení</div>'
-                f'<div class="insight-metric">{name}</div>'
-                f'<div class="insight-nums">Kurýr: <strong>{v:.2f}{suf}</strong> · medián: {p50:.2f}{suf} · lepší kvartil: {p75:.2f}{suf} (pod mediánem)</div>'
-                f'<div class="insight-text">{d.get("recommendation", "")}</div>'
-                f'<div class="insight-why">{why}</div>'
-                f"</div>",
-                unsafe_allow_html=True,
-            )
-    else:
-        st.caption("Všechny metriky na úrovni nebo nad mediánem.")
+        history = dataset_store().history
+        if history is not None and history.months:
+            with timings.stage("history"):
+                render_trend(history.trend(key), ds.metric_cols)
 
 
 if __name__ == "__main__":
-    main()
+    if st.runtime.exists():
+        main()
+    else:
+        warm_up()
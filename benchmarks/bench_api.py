@@ -0,0 +1,136 @@
+"""
+Load test of the JSON API (api.py): throughput and latency of /drivers, /search and /segments/.../benchmarks.
+
+By default a server over a synthetic dataset (--rows) runs in a child process, so the clients do not share its GIL;
+pass --url to test a running server instead. Clients are threads with keep-alive connections; every request picks a
+random endpoint from the mix. --revalidate sends If-None-Match with the last ETag (304 path).
+
+    python benchmarks/bench_api.py --rows 100000 --clients 16 --seconds 10
+    python benchmarks/bench_api.py --url http://127.0.0.1:8502 --clients 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import multiprocessing as mp
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import api  # noqa: E402
+from app import Dataset, DatasetStore  # noqa: E402
+from synthetic import make_frame  # noqa: E402
+
+
+def _serve(rows: int, port: "mp.Value") -> None:
+    store = DatasetStore()
+    store.publish(Dataset.build(make_frame(rows), "bench"))
+    server = api.make_server("127.0.0.1", 0, store)
+    port.value = server.server_address[1]
+    server.serve_forever()
+
+
+def _paths(rows: int, count: int, seed: int) -> list[str]:
+    """Endpoint mix: 60 % /drivers, 30 % /search (surname prefixes), 10 % /segments/.../benchmarks."""
+    frame = make_frame(rows)
+    rng = np.random.default_rng(seed)
+    segments = frame["segment"].astype(str).unique()
+    out = []
+    for _ in range(count):
+        i = int(rng.integers(len(frame)))
+        r = rng.random()
+        if r < 0.6:
+            out.append(f"/drivers/{frame['driver_id'].iat[i]}")
+        elif r < 0.9:
+            surname = str(frame["full_name"].iat[i]).split(" ")[-1]
+            out.append(f"/search?q={quote(surname[:4])}")
+        else:
+            out.append(f"/segments/{quote(str(rng.choice(segments)))}/benchmarks")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="running server; default: start one over synthetic data")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match (measures the 304 path)")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        host, port = urlsplit(args.url).hostname, urlsplit(args.url).port or 80
+    else:
+        port_value = mp.Value("i", 0)
+        server = mp.Process(target=_serve, args=(args.rows, port_value), daemon=True)
+        server.start()
+        while port_value.value == 0:
+            time.sleep(0.05)
+        host, port = "127.0.0.1", port_value.value
+    paths = _paths(args.rows, 10_000, seed=0)
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def client(seed: int) -> None:
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        rng = np.random.default_rng(seed)
+        etag = None
+        local, codes = [], {}
+        while time.perf_counter() < deadline:
+            headers = {"If-None-Match": etag} if args.revalidate and etag else {}
+            t0 = time.perf_counter()
+            conn.request("GET", paths[int(rng.integers(len(paths)))], headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            local.append(time.perf_counter() - t0)
+            codes[resp.status] = codes.get(resp.status, 0) + 1
+            etag = resp.getheader("ETag") or etag
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            for k, v in codes.items():
+                statuses[k] = statuses.get(k, 0) + v
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    if server is not None:
+        server.terminate()
+
+    ms = np.array(latencies) * 1000
+    result = {
+        "clients": args.clients,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "statuses": statuses,
+    }
+    print(
+        f"{result['requests']} requests in {elapsed:.1f} s with {args.clients} clients: {result['rps']:.0f} req/s, "
+        f"p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, status {statuses}"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
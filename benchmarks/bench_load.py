@@ -0,0 +1,341 @@
+"""
+Load test of the Streamlit app with many concurrent support sessions: per-interaction latency SLOs and server RSS.
+
+Starts `streamlit run app.py` on a synthetic workbook and connects --sessions clients over the same websocket protocol
+the browser uses. Each session logs in, then for --lookups couriers types the surname letter by letter (every
+keystroke is one rerun, i.e. as-you-type search; a real text box commits on Enter, so this is the worst case), picks
+a result and types the driver_id. Widget changes carry the fragment id like the browser's, so keystrokes rerun only
+the search fragment. Latency is measured in the client, from sending the change to the end of the rerun, so it
+includes the time a session waits for the server while others are running.
+
+All sessions start together (shift change) unless --ramp spreads them. The server's RSS is sampled throughout.
+Reported: throughput, p50/p95/p99/max per interaction, app script time from the timing log, RSS at start and peak.
+The exit code is 1 if an SLO is exceeded or a rerun failed; SLOs are interaction:percentile=ms or rss_mb=MB.
+
+    python benchmarks/bench_load.py --sessions 30 --lookups 3
+    python benchmarks/bench_load.py --sessions 50 --slo keystroke:p95=250 --slo select:p99=1500 --slo rss_mb=1200
+    python benchmarks/bench_load.py --app /tmp/app_before.py --json before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app import APP_PASSWORD  # noqa: E402
+from synthetic import make_frame, write_workbook  # noqa: E402
+
+INTERACTIONS = ("login", "keystroke", "select")
+STATS = ("p50", "p95", "p99", "max")
+DEFAULT_SLOS = ["keystroke:p95=300", "select:p95=800", "login:p95=3000"]
+
+
+class Session:
+    """One simulated browser tab: the websocket, the widgets last rendered (by user key) and the values it has set."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.widgets: dict[str, tuple[str, str, object]] = {}  # key -> (widget id, fragment id, element proto)
+        self.values: dict[str, tuple[str, object]] = {}  # widget id -> (WidgetState field, value)
+        self.errors: list[str] = []
+
+    async def rerun(self, timeout: float, changed: str | None = None, trigger: str | None = None) -> float:
+        """Send the current widget states (as the browser does after a change to widget id `changed`, or a click on
+        button id `trigger`) and wait for the end of the rerun. Returns the latency in ms."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = ""
+        state.page_script_hash = ""
+        fragment = next((f for w, f, _ in self.widgets.values() if w == changed), "")
+        if fragment:
+            state.fragment_id = fragment
+        for widget_id, (kind, value) in self.values.items():
+            w = state.widget_states.widgets.add()
+            w.id = widget_id
+            setattr(w, kind, value)
+        if trigger:
+            w = state.widget_states.widgets.add()
+            w.id = trigger
+            w.trigger_value = True
+        async def until_finished() -> None:
+            while True:
+                fwd = ForwardMsg()
+                fwd.ParseFromString(await self.ws.recv())
+                kind = fwd.WhichOneof("type")
+                if kind == "new_session":
+                    # Widgets in this run's scope (page or fragments) are re-sent; the others are gone
+                    scope = set(fwd.new_session.fragment_ids_this_run)
+                    self.widgets = {k: v for k, v in self.widgets.items() if scope and v[1] not in scope}
+                elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                    self._element(fwd.delta.new_element, fwd.delta.fragment_id)
+                elif kind == "script_finished" and fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await asyncio.wait_for(until_finished(), timeout)
+        ms = (time.perf_counter() - t0) * 1000
+        live = {w for w, _, _ in self.widgets.values()}
+        self.values = {k: v for k, v in self.values.items() if k in live}
+        return ms
+
+    def _element(self, element, fragment_id: str) -> None:
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(element.exception.message)
+            return
+        proto = getattr(element, kind)
+        widget_id = getattr(proto, "id", "")
+        if widget_id.startswith("$$ID-"):
+            key = widget_id.split("-", 2)[2]
+            self.widgets[proto.label if key == "None" else key] = (widget_id, fragment_id, proto)
+
+    def set(self, key: str, kind: str, value: object) -> str | None:
+        """Set widget `key` (or label, for widgets without a key); returns its id, None if it is not on the page."""
+        if key not in self.widgets:
+            return None
+        widget_id = self.widgets[key][0]
+        self.values[widget_id] = (kind, value)
+        return widget_id
+
+
+def _scenario(frame, lookups: int, seed: int) -> list[tuple[str, str, object]]:
+    """(interaction, widget key, value): surname keystrokes, a pick, driver_id keystrokes, per courier."""
+    rng = np.random.default_rng(seed)
+    steps: list[tuple[str, str, object]] = []
+    for _ in range(lookups):
+        i = int(rng.integers(len(frame)))
+        surname = str(frame["full_name"].iat[i]).split(" ")[-1]
+        steps += [("keystroke", "search", surname[:k]) for k in range(1, len(surname) + 1)]
+        steps.append(("select", "driver_select", 1))
+        did = str(frame["driver_id"].iat[i])
+        steps += [("keystroke", "search", did[:k]) for k in range(1, len(did) + 1)]
+    return steps
+
+
+async def _run_session(
+    url: str, steps: list, think: float, timeout: float, delay: float, results: dict[str, list[float]], errors: list
+) -> None:
+    from websockets.asyncio.client import connect
+
+    await asyncio.sleep(delay)
+    async with connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout) as ws:
+        s = Session(ws)
+        try:
+            await s.rerun(timeout)  # page load: the login form
+            s.set("pwd_input", "string_value", APP_PASSWORD)
+            results["login"].append(await s.rerun(timeout, trigger=s.widgets["Přihlásit"][0]))
+            deadline = time.monotonic() + timeout
+            while "search" not in s.widgets and time.monotonic() < deadline:
+                await asyncio.sleep(0.5)  # the server's first data load is still running: the page is a placeholder
+                await s.rerun(timeout)
+            for kind, key, value in steps:
+                await asyncio.sleep(think)
+                if kind == "select":
+                    if key not in s.widgets or len(s.widgets[key][2].options) <= value:
+                        continue  # a unique match shows the scorecard without a picker
+                    value = s.widgets[key][2].options[value]
+                widget_id = s.set(key, "string_value", value)
+                if widget_id is None:
+                    errors.append(f"widget {key!r} not on the page")
+                    return
+                results[kind].append(await s.rerun(timeout, changed=widget_id))
+        except asyncio.TimeoutError:  # not the builtin TimeoutError before Python 3.11
+            errors.append(f"rerun took longer than {timeout:g} s")
+        except Exception as e:  # connection dropped, server gone
+            errors.append(f"session failed: {e!r}")
+        errors.extend(s.errors)
+
+
+def _rss_mb(pid: int) -> float:
+    """Resident set size of the process (Linux /proc); 0 where not available."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _start_server(app_path: Path, port: int, env: dict[str, str]) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", str(app_path), "--server.headless", "true",
+        "--server.port", str(port), "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none",
+    ]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("streamlit server did not start")
+
+
+def _parse_slos(specs: list[str]) -> list[tuple[str, str, float]]:
+    """"keystroke:p95=300" -> ("keystroke", "p95", 300.0); "rss_mb=1200" -> ("rss_mb", "peak", 1200.0)."""
+    out = []
+    for spec in specs:
+        name, _, limit = spec.partition("=")
+        interaction, _, stat = name.partition(":")
+        if not limit or (interaction != "rss_mb" and (interaction not in INTERACTIONS or stat not in STATS)):
+            raise SystemExit(
+                f"bad --slo {spec!r}; expected {'|'.join(INTERACTIONS)}:{'|'.join(STATS)}=ms or rss_mb=MB"
+            )
+        out.append((interaction, stat or "peak", float(limit)))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", type=Path, default=ROOT / "app.py", help="app.py to load-test (e.g. an older version)")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent support sessions")
+    parser.add_argument("--lookups", type=int, default=2, help="couriers looked up per session")
+    parser.add_argument("--think-ms", type=float, default=150, help="pause between a session's interactions")
+    parser.add_argument("--ramp", type=float, default=0, help="seconds over which the sessions start (0 = at once)")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds one rerun may take before it fails")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--slo", action="append", help=f"threshold, repeatable (default: {' '.join(DEFAULT_SLOS)})")
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "scorecard-bench")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+    slos = _parse_slos(args.slo or DEFAULT_SLOS)
+
+    try:
+        import websockets  # noqa: F401  (installed with streamlit)
+    except ImportError as e:
+        raise SystemExit("the load test needs the websockets package: pip install websockets") from e
+
+    path = args.workdir / f"synthetic-{args.rows}.xlsx"
+    if not path.exists():
+        write_workbook(path, args.rows)
+    frame = make_frame(args.rows)
+    cache_dir = Path(tempfile.mkdtemp(prefix="scorecard-load-"))
+    timing_log = cache_dir / "timings.jsonl"
+    env = {
+        **os.environ,
+        "SCORECARD_EXCEL_PATH": str(path),
+        "SCORECARD_CACHE_DIR": str(cache_dir),
+        "SCORECARD_TIMING_LOG": str(timing_log),
+    }
+    env.pop("SCORECARD_SOURCES", None)
+    proc = _start_server(args.app.resolve(), args.port, env)
+    url = f"ws://127.0.0.1:{args.port}/_stcore/stream"
+    try:
+        warm: dict[str, list[float]] = defaultdict(list)
+        warm_errors: list[str] = []
+        asyncio.run(_run_session(url, [], 0, args.timeout, 0, warm, warm_errors))  # first data load, not measured
+        if warm_errors:
+            raise SystemExit(f"warm-up session failed: {warm_errors[0]}")
+        log_offset = timing_log.stat().st_size if timing_log.exists() else 0
+        rss_start = _rss_mb(proc.pid)
+        rss_peak = rss_start
+        sampling = threading.Event()
+
+        def sample_rss() -> None:
+            nonlocal rss_peak
+            while not sampling.wait(0.1):
+                rss_peak = max(rss_peak, _rss_mb(proc.pid))
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+        results: dict[str, list[float]] = defaultdict(list)
+        errors: list[str] = []
+
+        async def run_all() -> None:
+            await asyncio.gather(
+                *(
+                    _run_session(
+                        url, _scenario(frame, args.lookups, seed=i), args.think_ms / 1000, args.timeout,
+                        args.ramp * i / max(1, args.sessions), results, errors,
+                    )
+                    for i in range(args.sessions)
+                )
+            )
+
+        t0 = time.perf_counter()
+        asyncio.run(run_all())
+        wall = time.perf_counter() - t0
+        sampling.set()
+        sampler.join()
+        script_ms = []
+        if timing_log.exists():  # an older app.py may not write one
+            with timing_log.open(encoding="utf-8") as f:
+                f.seek(log_offset)
+                script_ms = [r["total_ms"] for r in map(json.loads, filter(str.strip, f)) if "total_ms" in r]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    report: dict[str, dict[str, float]] = {}
+    for kind, ms in results.items():
+        a = np.asarray(ms)
+        report[kind] = {
+            "n": len(a),
+            "p50": float(np.percentile(a, 50)),
+            "p95": float(np.percentile(a, 95)),
+            "p99": float(np.percentile(a, 99)),
+            "max": float(a.max()),
+        }
+    interactions = sum(r["n"] for r in report.values())
+    print(f"{args.app} rows={args.rows} sessions={args.sessions} lookups={args.lookups} think={args.think_ms:g} ms")
+    print(f"{'interaction':<12}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for kind, r in report.items():
+        print(f"{kind:<12}{r['n']:>7}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['max']:>10.1f}")
+    if script_ms:
+        print(f"app script time (timing log): p50 {np.percentile(script_ms, 50):.1f} ms, "
+              f"p95 {np.percentile(script_ms, 95):.1f} ms over {len(script_ms)} reruns")
+    print(f"throughput {interactions / wall:.1f} interactions/s over {wall:.1f} s")
+    print(f"server RSS {rss_start:.0f} MB at start, {rss_peak:.0f} MB peak")
+
+    violations = [f"{len(errors)} failed reruns, e.g. {errors[0]}"] if errors else []
+    for interaction, stat, limit in slos:
+        value = rss_peak if interaction == "rss_mb" else report.get(interaction, {}).get(stat)
+        if value is None:
+            print(f"SLO {interaction}:{stat} <= {limit:g}: not measured")
+            violations.append(f"{interaction}:{stat} not measured")
+            continue
+        ok = value <= limit
+        print(f"SLO {interaction}:{stat} <= {limit:g}: {value:.1f} {'ok' if ok else 'EXCEEDED'}")
+        if not ok:
+            violations.append(f"{interaction}:{stat} {value:.1f} > {limit:g}")
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "app": str(args.app), "rows": args.rows, "sessions": args.sessions, "lookups": args.lookups,
+            "wall_s": wall, "throughput": interactions / wall, "rss_start_mb": rss_start, "rss_peak_mb": rss_peak,
+            "script_ms": {"p50": float(np.percentile(script_ms, 50)), "p95": float(np.percentile(script_ms, 95))}
+            if script_ms else {},
+            "results": report, "violations": violations,
+        }, indent=2))
+    if violations:
+        print("FAILED: " + "; ".join(violations))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
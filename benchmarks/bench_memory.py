@@ -0,0 +1,42 @@
+"""
+Memory of the driver frame before and after the compact layout (categoricals, int32 rank, lazy contact_email).
+
+    python benchmarks/bench_memory.py --rows 100000 --json memory.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import LAZY_COLUMNS, _normalize_frame, memory_report  # noqa: E402
+from synthetic import make_frame  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--json", type=Path, help="write the per-column report to this file")
+    args = parser.parse_args()
+
+    raw = make_frame(args.rows).astype({"segment": object, "working_city": object, "primary_ride_type": object})
+    before = memory_report(raw)
+    compact = _normalize_frame(raw.copy()).drop(columns=LAZY_COLUMNS)
+    after = memory_report(compact)
+
+    print(f"{args.rows} rows")
+    print(f"{'column':<24}{'before MB':>12}{'after MB':>12}")
+    for col, b in before.items():
+        a = after.get(col, 0)
+        print(f"{col:<24}{b / 1e6:>12.2f}{a / 1e6:>12.2f}{'  (lazy)' if col in LAZY_COLUMNS else ''}")
+    print(f"saved {1 - after['total'] / before['total']:.0%}")
+    if args.json:
+        args.json.write_text(json.dumps({"rows": args.rows, "before": before, "after": after}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
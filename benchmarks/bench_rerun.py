@@ -0,0 +1,123 @@
+"""
+Rerun latency of the scorecard page for a typical support interaction, to compare two versions of app.py.
+
+Logs in via AppTest, then replays: typing a surname letter by letter, picking a courier, typing a driver_id letter by
+letter, switching the cohort comparison, and re-opening couriers already shown. Every step is one rerun; per step kind
+the script time (total_ms from the app's own timing log) is reported as p50/p95. The wall time of AppTest.run() is
+printed too but is dominated by AppTest's polling, not by the app. AppTest always reruns the whole script, so savings from st.fragment (a keystroke that only
+reruns the search fragment) come on top of these numbers; in production they show up as "scope" records in the timing
+log.
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmarks/bench_rerun.py --app /tmp/app_before.py --json before.json
+    python benchmarks/bench_rerun.py --json after.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from synthetic import make_frame, write_workbook  # noqa: E402
+
+
+def _steps(rows: int, drivers: int, seed: int) -> list[tuple[str, str, object]]:
+    """(kind, widget key, value) steps; kinds: keystroke, pick, cohort, revisit."""
+    frame = make_frame(rows)
+    rng = np.random.default_rng(seed)
+    steps: list[tuple[str, str, object]] = []
+    shown: list[str] = []
+    for _ in range(drivers):
+        i = int(rng.integers(len(frame)))
+        surname = str(frame["full_name"].iat[i]).split(" ")[-1]
+        for k in range(1, len(surname) + 1):
+            steps.append(("keystroke", "search", surname[:k]))
+        steps.append(("pick", "driver_select", 1))
+        did = str(frame["driver_id"].iat[i])
+        for k in range(1, len(did) + 1):
+            steps.append(("keystroke", "search", did[:k]))
+        shown.append(did)
+        steps.append(("cohort", "cohort_level", "city"))
+        steps.append(("cohort", "cohort_level", "segment"))
+    for did in shown:
+        steps.append(("revisit", "search", did))
+    return steps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", type=Path, default=ROOT / "app.py", help="app.py to measure (e.g. an older version)")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--drivers", type=int, default=10, help="couriers looked up in the scenario")
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "scorecard-bench")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    path = args.workdir / f"synthetic-{args.rows}.xlsx"
+    if not path.exists():
+        write_workbook(path, args.rows)
+    os.environ["SCORECARD_EXCEL_PATH"] = str(path)
+    cache_dir = Path(tempfile.mkdtemp(prefix="scorecard-bench-"))
+    timing_log = cache_dir / "timings.jsonl"
+    os.environ["SCORECARD_CACHE_DIR"] = str(cache_dir)
+    os.environ["SCORECARD_TIMING_LOG"] = str(timing_log)
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(args.app.resolve()), default_timeout=600)
+    at.session_state["authenticated"] = True
+    at.run()  # starts the first data load; not measured
+    while "search" not in [w.key for w in at.text_input]:  # the page shows a placeholder until the load finished
+        time.sleep(0.2)
+        at.run()
+
+    script: dict[str, list[float]] = defaultdict(list)
+    wall: dict[str, list[float]] = defaultdict(list)
+    for kind, key, value in _steps(args.rows, args.drivers, seed=0):
+        if kind == "pick":
+            if key not in [w.key for w in at.selectbox]:
+                continue
+            at.selectbox(key=key).select_index(value)
+        elif kind == "cohort":
+            if key not in [w.key for w in at.radio]:
+                continue
+            at.radio(key=key).set_value(value)
+        else:
+            at.text_input(key=key).input(value)
+        t0 = time.perf_counter()
+        at.run()
+        wall[kind].append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        last = timing_log.read_text(encoding="utf-8").splitlines()[-1]
+        script[kind].append(json.loads(last)["total_ms"])
+
+    results = {}
+    print(f"{args.app} rows={args.rows}")
+    print(f"{'step':<11}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'wall p50':>10}")
+    for kind, ms in script.items():
+        results[kind] = {
+            "n": len(ms),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "wall_p50_ms": float(np.percentile(wall[kind], 50)),
+        }
+        r = results[kind]
+        print(f"{kind:<11}{r['n']:>6}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['wall_p50_ms']:>10.1f}")
+    if args.json:
+        args.json.write_text(json.dumps({"app": str(args.app), "rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
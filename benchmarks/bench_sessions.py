@@ -0,0 +1,103 @@
+"""
+Shared Dataset vs. per-session st.cache_data copies: memory and per-rerun latency at 1, 10 and 50 concurrent sessions.
+
+"cache_data" mimics the old load_all_data: every rerun unpickles its own copy of the frame (what st.cache_data does on
+a cache hit) and keeps it while the rerun renders. "shared" takes the process-wide Dataset from a DatasetStore.
+Sessions run as threads, like Streamlit script runs in one server process.
+
+    python benchmarks/bench_sessions.py --rows 50000 --reruns 20 --json bench_sessions.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import Dataset, DatasetStore  # noqa: E402
+from synthetic import make_frame  # noqa: E402
+
+RENDER_SECONDS = 0.005  # time a rerun holds its frame while "rendering"
+
+
+def _run_sessions(sessions: int, reruns: int, rerun) -> tuple[list[float], int]:
+    """Run `sessions` threads doing `reruns` reruns each; returns (per-rerun latencies in s, peak traced bytes)."""
+    latencies: list[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(sessions)
+
+    def session(seed: int) -> None:
+        rng = np.random.default_rng(seed)
+        barrier.wait()
+        for _ in range(reruns):
+            t0 = time.perf_counter()
+            rerun(rng)
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+
+    tracemalloc.start()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencies, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--reruns", type=int, default=20, help="reruns per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    pickled = pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)
+    store = DatasetStore()
+    store.publish(Dataset.build(frame, "bench"))
+
+    def rerun_cache_data(rng: np.random.Generator) -> None:
+        df = pickle.loads(pickled)
+        df.iloc[int(rng.integers(len(df)))]
+        time.sleep(RENDER_SECONDS)
+
+    def rerun_shared(rng: np.random.Generator) -> None:
+        ds, _ = store.get()
+        ds.frame.iloc[int(rng.integers(len(ds.frame)))]
+        time.sleep(RENDER_SECONDS)
+
+    results = []
+    print(f"rows={args.rows} frame={frame.memory_usage(deep=True).sum() / 1e6:.1f} MB reruns/session={args.reruns}")
+    print(f"{'mode':<11}{'sessions':>9}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>10}")
+    for mode, rerun in (("cache_data", rerun_cache_data), ("shared", rerun_shared)):
+        for n in args.sessions:
+            latencies, peak = _run_sessions(n, args.reruns, rerun)
+            ms = np.array(latencies) * 1000
+            row = {
+                "mode": mode,
+                "sessions": n,
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "peak_mb": peak / 1e6,
+            }
+            results.append(row)
+            print(f"{mode:<11}{n:>9}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['peak_mb']:>10.1f}")
+    if args.json:
+        args.json.write_text(json.dumps({"rows": args.rows, "reruns": args.reruns, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
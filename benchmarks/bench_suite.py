@@ -0,0 +1,193 @@
+"""
+Benchmark suite on synthetic workbooks: load, search, benchmarks, insights and a full scorecard render.
+
+For every size a workbook with the real sheet names and columns is generated (and reused from --workdir),
+then each stage is timed --repeat times (p50/p95 in ms) and run once more under tracemalloc for peak memory.
+Results go to a JSON file; pass --baseline with an earlier file to print the ratio per stage.
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 --out bench_results/current.json
+    python benchmarks/bench_suite.py --sizes 1000 10000 --baseline bench_results/current.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import app  # noqa: E402
+from synthetic import write_workbook  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def _measure(fn: Callable[[int], object], repeat: int) -> dict[str, float]:
+    """Time fn(i) for i in range(repeat), then once more under tracemalloc. Returns p50/p95 ms and peak MB."""
+    times = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        times.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn(repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "n": repeat,
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def _queries(frame: pd.DataFrame, count: int, seed: int) -> list[str]:
+    """Mix of surname prefixes, full driver_ids and misspelled surnames taken from the data."""
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(frame), count)
+    out = []
+    for k, i in enumerate(rows):
+        name = str(frame["full_name"].iloc[i])
+        surname = name.split(" ")[-1]
+        kind = k % 3
+        if kind == 0:
+            out.append(surname[: max(3, len(surname) // 2)])
+        elif kind == 1:
+            out.append(str(frame["driver_id"].iloc[i]))
+        else:
+            out.append(surname[1] + surname[0] + surname[2:] if len(surname) > 2 else surname)
+    return out
+
+
+def _render_benchmark(repeat: int, frame: pd.DataFrame) -> dict[str, float]:
+    """Time the rerun after typing a driver_id into the search box (full scorecard render) via AppTest."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()  # drop the DatasetStore of a previous size
+    ids = [str(v) for v in frame["driver_id"].sample(repeat + 1, random_state=0, replace=True)]
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=600)
+    at.session_state["authenticated"] = True
+    at.run()
+
+    def render(i: int) -> None:
+        at.text_input(key="search").input(ids[i])
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    return _measure(render, repeat)
+
+
+def run_size(rows: int, repeat: int, workdir: Path, render: bool) -> dict[str, dict[str, float]]:
+    path = workdir / f"synthetic-{rows}.xlsx"
+    if not path.exists():
+        t0 = time.perf_counter()
+        write_workbook(path, rows)
+        print(f"  generated {path.name} in {time.perf_counter() - t0:.1f} s", flush=True)
+    cache_dir = Path(tempfile.mkdtemp(prefix="scorecard-bench-"))
+    os.environ["SCORECARD_EXCEL_PATH"] = str(path)
+    os.environ["SCORECARD_CACHE_DIR"] = str(cache_dir)
+    app.EXCEL_PATH, app.SNAPSHOT_DIR = path, cache_dir
+    data = path.read_bytes()
+    stages: dict[str, dict[str, float]] = {}
+    try:
+
+        def load_cold(_: int) -> None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            store = app.DatasetStore()
+            store.refresh()
+
+        stages["load_all_data (xlsx parse)"] = _measure(load_cold, max(1, repeat // 5))
+        stages["load_all_data (snapshot)"] = _measure(lambda _: app.DatasetStore().refresh(), repeat)
+        frame = app._parse_workbook(data)
+        stages["dataset build (indexes)"] = _measure(lambda _: app.Dataset.build(frame), max(1, repeat // 5))
+        ds = app.Dataset.build(frame)
+
+        queries = _queries(frame, repeat + 1, seed=rows)
+        stages["search_drivers"] = _measure(lambda i: app.search_drivers(frame, queries[i], ds.search), repeat)
+        stages["fuzzy search"] = _measure(lambda i: ds.search.fuzzy(queries[i]), repeat)
+        stages["compute_benchmarks_per_sheet"] = _measure(lambda _: app.compute_benchmarks_per_sheet(frame), repeat)
+
+        positions = np.random.default_rng(rows).integers(0, len(frame), repeat + 1)
+
+        def insights(i: int) -> None:
+            row = frame.iloc[positions[i]]
+            app.get_insights(row, ds.benchmarks.get(row["segment"], {}), ds.metric_cols)
+
+        stages["get_insights"] = _measure(insights, repeat)
+        stages["insight table lookup"] = _measure(lambda i: ds.insights.insights_at(int(positions[i])), repeat)
+        stages["scorecard_html"] = _measure(lambda i: app.scorecard_html(ds, int(positions[i])), repeat)
+        segments = frame["segment"].astype(str).to_numpy()
+        stages["what-if simulate"] = _measure(
+            lambda i: ds.model.simulate(int(positions[i]), segments[positions[i]], {ds.metric_cols[0]: 4.0}), repeat
+        )
+        if render:
+            stages["scorecard render (AppTest)"] = _render_benchmark(repeat, frame)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return stages
+
+
+def _meta() -> dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="total rows (e.g. 1000000)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workdir", type=Path, default=Path(tempfile.gettempdir()) / "scorecard-bench")
+    parser.add_argument("--out", type=Path, default=ROOT / "bench_results" / "latest.json")
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--no-render", action="store_true", help="skip the AppTest scorecard render")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.sizes:
+        print(f"{rows} rows", flush=True)
+        for stage, m in run_size(rows, args.repeat, args.workdir, not args.no_render).items():
+            results.append({"rows": rows, "stage": stage, **m})
+            print(f"  {stage:<30}{m['p50_ms']:>10.2f} ms p50{m['p95_ms']:>10.2f} ms p95{m['peak_mb']:>9.1f} MB", flush=True)
+
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps({"meta": _meta(), "results": results}, indent=2), encoding="utf-8")
+    print(f"results written to {args.out}")
+
+    if args.baseline:
+        base = {(r["rows"], r["stage"]): r for r in json.loads(args.baseline.read_text(encoding="utf-8"))["results"]}
+        print(f"vs {args.baseline} (p50 ratio, >1 = slower now)")
+        for r in results:
+            b = base.get((r["rows"], r["stage"]))
+            if b and b["p50_ms"] > 0:
+                print(f"  {r['rows']:>8} {r['stage']:<30}{r['p50_ms'] / b['p50_ms']:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Synthetic scorecard data for benchmarks: same columns and sheets as the monthly export, random values.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import METRIC_COLUMNS, SHEET_NAMES  # noqa: E402
+
+FIRST_NAMES = ["Jan", "Petr", "Pavel", "Tomáš", "Jiří", "Martin", "Lucie", "Eva", "Jana", "Tereza", "Kateřina", "Lukáš"]
+LAST_NAMES = [
+    "Novák", "Svoboda", "Novotný", "Dvořák", "Černý", "Procházka", "Kučera", "Veselý", "Horák", "Němec",
+    "Pokorný", "Marek", "Pospíšil", "Hájek", "Jelínek", "Král", "Růžička", "Beneš", "Fiala", "Sedláček",
+]
+CITIES = ["Praha", "Brno", "Ostrava", "Olomouc", "Hradec Králové", "Plzeň"]
+RIDE_TYPES = ["car", "van", "bike"]
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Frame shaped like load_all_data() output: rows spread over SHEET_NAMES, rank 1..n within each segment."""
+    rng = np.random.default_rng(seed)
+    segment = np.array(SHEET_NAMES, dtype=object)[rng.integers(0, len(SHEET_NAMES), rows)]
+    # Unique-ish surnames at scale: append a numeric suffix to part of the base names
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), rows)]
+    suffix = rng.integers(0, max(1, rows // 50), rows)
+    full_name = [
+        f"{f} {last_name}{'' if s % 3 == 0 else s}"
+        for f, last_name, s in zip(np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), rows)], last, suffix)
+    ]
+    driver_id = rng.permutation(rows) + 100_000
+    df = pd.DataFrame(
+        {
+            "full_name": full_name,
+            "contact_email": [f"courier{d}@example.com" for d in driver_id],
+            "driver_id": driver_id,
+            "primary_ride_type": np.array(RIDE_TYPES, dtype=object)[rng.integers(0, len(RIDE_TYPES), rows)],
+            "working_city": np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), rows)],
+        }
+    )
+    for col in METRIC_COLUMNS:
+        values = rng.beta(5, 2, rows) if col == "Delivery Quality" else rng.normal(3.0, 1.0, rows).round(2)
+        values[rng.random(rows) < 0.02] = np.nan
+        df[col] = values
+    df["drivers_score"] = df[METRIC_COLUMNS].fillna(0).mean(axis=1).round(3)
+    df["segment"] = segment
+    df["rank"] = df.groupby("segment")["drivers_score"].rank(ascending=False, method="first").astype(int)
+    return df[["full_name", "contact_email", "driver_id", "primary_ride_type", "working_city", "rank", "drivers_score"]
+              + METRIC_COLUMNS + ["segment"]]
+
+
+def write_workbook(path: Path, rows: int, seed: int = 0) -> Path:
+    """Write a multi-sheet xlsx like the monthly export (one sheet per SHEET_NAMES entry, no segment column)."""
+    import openpyxl
+
+    df = make_frame(rows, seed)
+    columns = [c for c in df.columns if c != "segment"]
+    wb = openpyxl.Workbook(write_only=True)
+    for sheet in SHEET_NAMES:
+        ws = wb.create_sheet(sheet)
+        ws.append(columns)
+        part = df[df["segment"] == sheet].sort_values("rank")
+        for record in part[columns].itertuples(index=False, name=None):
+            ws.append([None if isinstance(v, float) and v != v else v for v in record])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return path
@@ -0,0 +1,140 @@
+"""
+Batch export of every courier's scorecard as a standalone HTML (and optionally PDF) file, e.g. for the monthly e-mail.
+
+Uses the same Dataset as the app (snapshot cache, benchmarks, insights, tier gaps) and the same HTML and BRAND_CSS as
+the scorecard page. Rows are split into chunks that run on a process pool; every file is written atomically, so an
+interrupted run picks up where it stopped when started again with the same --out (files already there are skipped).
+Output goes to <out>/<data version>/, so a new month never mixes with files of the previous one.
+
+    python export_scorecards.py --out exports
+    python export_scorecards.py --out exports --pdf --workers 8 --chunk 500
+    python export_scorecards.py --out exports --segment OOH --limit 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import app
+
+logger = logging.getLogger("driver_score.export")
+
+# Dataset of a pool worker, loaded once by _init_worker (from the snapshot the parent wrote)
+_DATASET: app.Dataset | None = None
+
+
+def export_filename(driver_id: object, segment: object) -> str:
+    """<driver_id>_<segment> with anything unsafe for file names replaced; unique per driver_key."""
+    return re.sub(r"[^\w.-]+", "_", f"{app._cell_str(driver_id)}_{app._cell_str(segment)}", flags=re.UNICODE)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _html_to_pdf(html: str) -> bytes:
+    try:
+        from weasyprint import HTML
+    except ImportError as e:
+        raise SystemExit("PDF export needs WeasyPrint: pip install weasyprint") from e
+    return HTML(string=html).write_pdf()
+
+
+def _init_worker(version: str) -> None:
+    global _DATASET
+    store = app.DatasetStore()
+    store.refresh()
+    ds, error_hint = store.get()
+    if ds is None or ds.version != version:
+        raise RuntimeError(f"data changed or unavailable while exporting ({error_hint or 'new version'})")
+    _DATASET = ds
+
+
+def export_chunk(positions: list[int], out_dir: Path, pdf: bool, ds: app.Dataset | None = None) -> tuple[int, int]:
+    """Write the scorecards of the given rows; returns (written, skipped because already exported)."""
+    ds = ds or _DATASET
+    frame = ds.frame
+    written = skipped = 0
+    for pos in positions:
+        name = export_filename(frame["driver_id"].iat[pos], frame["segment"].iat[pos])
+        html_path = out_dir / f"{name}.html"
+        pdf_path = out_dir / f"{name}.pdf"
+        if html_path.exists() and (not pdf or pdf_path.exists()):
+            skipped += 1
+            continue
+        html = app.scorecard_document(ds, pos)
+        if pdf:
+            _write_atomic(pdf_path, _html_to_pdf(html))
+        _write_atomic(html_path, html.encode("utf-8"))  # last, so an existing .html means the row is complete
+        written += 1
+    return written, skipped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, default=Path("exports"))
+    parser.add_argument("--pdf", action="store_true", help="also write a PDF per courier (needs WeasyPrint)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes; 1 = no pool")
+    parser.add_argument("--chunk", type=int, default=500, help="couriers per work unit")
+    parser.add_argument("--segment", action="append", help="only these segments (repeatable)")
+    parser.add_argument("--limit", type=int, help="only the first N couriers (for a trial run)")
+    args = parser.parse_args()
+    if args.chunk < 1:
+        parser.error("--chunk must be at least 1")
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    t0 = time.perf_counter()
+    store = app.DatasetStore()
+    store.refresh()  # also writes the Parquet snapshot the workers start from
+    ds, error_hint = store.get()
+    if ds is None:
+        logger.error("no data: %s", error_hint or "no data source configured")
+        raise SystemExit(1)
+
+    if args.segment:
+        unknown = sorted(set(args.segment) - set(ds.drivers.segment_sizes))
+        if unknown:
+            available = ", ".join(ds.drivers.segment_sizes)
+            logger.error("unknown segment(s): %s (available: %s)", ", ".join(unknown), available)
+            raise SystemExit(1)
+    mask = ds.frame["segment"].isin(args.segment).to_numpy() if args.segment else None
+    positions = [int(p) for p in range(len(ds.frame)) if mask is None or mask[p]][: args.limit]
+    if not positions:
+        logger.error("nothing to export: the selection is empty")
+        raise SystemExit(1)
+    out_dir = args.out / ds.version[:12]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    chunks = [positions[i : i + args.chunk] for i in range(0, len(positions), args.chunk)]
+    logger.info("exporting %d couriers in %d chunks to %s (%d workers)", len(positions), len(chunks), out_dir, args.workers)
+
+    written = skipped = 0
+    if args.workers <= 1:
+        for chunk in chunks:
+            w, s = export_chunk(chunk, out_dir, args.pdf, ds)
+            written, skipped = written + w, skipped + s
+    else:
+        with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(ds.version,)) as pool:
+            pending = {pool.submit(export_chunk, chunk, out_dir, args.pdf) for chunk in chunks}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    w, s = f.result()
+                    written, skipped = written + w, skipped + s
+                logger.info("%d / %d done", written + skipped, len(positions))
+    dt = time.perf_counter() - t0
+    logger.info("done in %.1f s: %d written, %d already exported (%.0f couriers/s)", dt, written, skipped, written / dt)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
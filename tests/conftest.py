@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+
+@pytest.fixture(scope="session")
+def workbook(tmp_path_factory):
+    """(reference frame, parsed Dataset) of a synthetic workbook, parsed the way the app loads it."""
+    import app
+    from synthetic import make_frame, write_workbook
+
+    tmp = tmp_path_factory.mktemp("workbook")
+    path = write_workbook(tmp / "book.xlsx", 600)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(app, "SNAPSHOT_DIR", tmp / "cache")
+        frame = app._parse_workbook(path.read_bytes())
+        ds = app.Dataset.build(frame, frame.attrs["data_version"])
+    return make_frame(600), ds
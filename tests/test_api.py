@@ -0,0 +1,37 @@
+"""api.handle: search limits and float formatting."""
+
+from __future__ import annotations
+
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+
+import api
+from app import Dataset, _normalize_frame
+from synthetic import make_frame
+
+
+@pytest.fixture(scope="module")
+def ds():
+    return Dataset.build(_normalize_frame(make_frame(500).drop(columns=["contact_email"])))
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "abc"])
+def test_search_rejects_invalid_limit(ds, limit):
+    with pytest.raises(api.ApiError) as e:
+        api.handle(ds, "/search", {"q": ["a"], "limit": [limit]})
+    assert e.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_search_limit_is_capped(ds):
+    body = api.handle(ds, "/search", {"q": ["a"], "limit": ["100000"]})
+    assert body["count"] > api.SEARCH_LIMIT_MAX
+    assert len(body["results"]) == api.SEARCH_LIMIT_MAX
+
+
+def test_float32_values_are_written_as_in_the_workbook():
+    assert api._num(np.float32(3.579)) == 3.579
+    assert api._num(float(np.float32(2.349))) == 2.349
+    assert api._num(np.float64("nan")) is None
+    assert api._num(np.int64(7)) == 7
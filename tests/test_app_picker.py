@@ -0,0 +1,53 @@
+"""The courier picker in the running app (AppTest): a pick is shown and survives further reruns."""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from synthetic import make_frame, write_workbook
+
+APP = Path(__file__).resolve().parents[1] / "app.py"
+ROWS = 500
+
+
+@pytest.fixture
+def at(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCORECARD_EXCEL_PATH", str(write_workbook(tmp_path / "book.xlsx", ROWS)))
+    monkeypatch.setenv("SCORECARD_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("SCORECARD_TIMING_LOG", str(tmp_path / "timings.jsonl"))
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.session_state["authenticated"] = True
+    at.run()
+    deadline = time.monotonic() + 120
+    while "search" not in [w.key for w in at.text_input] and time.monotonic() < deadline:
+        time.sleep(0.2)  # first data load still running: the page shows a placeholder
+        at.run()
+    assert not at.exception
+    return at
+
+
+def _common_surname() -> str:
+    surnames = make_frame(ROWS)["full_name"].str.split(" ").str[-1]
+    return str(surnames.value_counts().index[0])
+
+
+def test_pick_survives_reruns(at):
+    at.text_input(key="search").input(_common_surname()).run()
+    picker = at.selectbox(key="driver_select")
+    assert len(picker.options) > 2
+    first = picker.value
+    picker.select_index(2).run()
+    chosen = at.session_state["scorecard_key"]
+    assert chosen != first
+    assert chosen == at.selectbox(key="driver_select").value
+
+    at.run()
+    at.run()
+    assert not at.exception
+    assert "driver_select" in [w.key for w in at.selectbox]
+    assert at.selectbox(key="driver_select").value == chosen
+    assert at.session_state["scorecard_key"] == chosen
@@ -0,0 +1,72 @@
+"""BenchmarkCube: cohort quartiles equal the quantiles of that cohort's rows, and sparse cohorts fall back to the
+parent group (ride type rolled up, then city)."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import COHORT_ALL, BenchmarkCube, compute_benchmarks_per_sheet
+
+# Segment S: Praha 25 car + 5 bike, Brno 8 car + 4 bike; segment T: 3 couriers
+COHORTS = [("S", "Praha", "car", 25), ("S", "Praha", "bike", 5), ("S", "Brno", "car", 8), ("S", "Brno", "bike", 4)]
+COHORTS.append(("T", "Praha", "car", 3))
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    rows = [(seg, city, ride) for seg, city, ride, n in COHORTS for _ in range(n)]
+    df = pd.DataFrame(rows, columns=["segment", "working_city", "primary_ride_type"])
+    df["drivers_score"] = rng.uniform(1, 5, len(df))
+    df["Kvalita doručení"] = rng.uniform(0.8, 1.0, len(df))
+    return df
+
+
+@pytest.fixture(scope="module")
+def cube(frame):
+    return BenchmarkCube(frame)
+
+
+def _quartiles(values):
+    s = pd.Series(values)
+    return {"p25": s.quantile(0.25), "p50": s.quantile(0.5), "p75": s.quantile(0.75)}
+
+
+@pytest.mark.parametrize(
+    "key, used, size",
+    [
+        (("S", "Praha", "car"), ("S", "Praha", "car"), 25),
+        (("S", "Praha", "bike"), ("S", "Praha", COHORT_ALL), 30),
+        (("S", "Brno", "car"), ("S", COHORT_ALL, COHORT_ALL), 42),
+        (("S", COHORT_ALL, "bike"), ("S", COHORT_ALL, COHORT_ALL), 42),
+        (("T", "Praha", "car"), ("T", COHORT_ALL, COHORT_ALL), 3),
+    ],
+)
+def test_sparse_cohorts_roll_up(frame, cube, key, used, size):
+    got_key, benchmarks, got_size = cube.get(key)
+    assert (got_key, got_size) == (used, size)
+    mask = np.ones(len(frame), dtype=bool)
+    for col, value in zip(["segment", "working_city", "primary_ride_type"], used):
+        if value != COHORT_ALL:
+            mask &= (frame[col] == value).to_numpy()
+    for col in ("drivers_score", "Kvalita doručení"):
+        assert benchmarks[col] == pytest.approx(_quartiles(frame.loc[mask, col])), col
+
+
+def test_min_size_decides_the_fallback(cube):
+    assert cube.get(("S", "Brno", "car"), min_size=8)[0] == ("S", "Brno", "car")
+    assert cube.get(("S", "Brno", "bike"), min_size=8)[0] == ("S", "Brno", COHORT_ALL)
+    assert cube.get(("S", "Brno", "bike"), min_size=1)[0] == ("S", "Brno", "bike")
+
+
+def test_unknown_segment_and_segment_level(frame, cube):
+    assert cube.get(("X", "Praha", "car")) == (("X", COHORT_ALL, COHORT_ALL), {}, 0)
+    per_sheet = compute_benchmarks_per_sheet(frame)
+    for segment, benchmarks in per_sheet.items():
+        key = BenchmarkCube.cohort_key("segment", segment, "Praha", "car")
+        assert key == (segment, COHORT_ALL, COHORT_ALL)
+        for col, quartiles in benchmarks.items():
+            assert cube.cells[key][col] == pytest.approx(quartiles), (segment, col)
+    assert BenchmarkCube.label(BenchmarkCube.cohort_key("city", "S", "Brno", "car")) == "S · Brno"
@@ -0,0 +1,54 @@
+"""compute_benchmarks_per_sheet (one grouped multi-quantile pass) gives the same nested dict as the original
+per-segment mask-and-quantile loop, on the raw and on the compacted frame."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import _normalize_frame, compute_benchmarks_per_sheet, get_benchmark_columns
+from synthetic import make_frame
+
+
+def _row_wise_benchmarks(all_data):
+    """The original implementation: filter the frame per segment, three quantile calls per column."""
+    result = {}
+    for segment in all_data["segment"].unique():
+        seg_df = all_data[all_data["segment"] == segment]
+        result[segment] = {}
+        for col in get_benchmark_columns(seg_df):
+            s = seg_df[col].dropna()
+            if s.empty:
+                result[segment][col] = {"p25": 0.0, "p50": 0.0, "p75": 0.0}
+            else:
+                result[segment][col] = {k: float(s.quantile(q)) for k, q in (("p25", 0.25), ("p50", 0.5), ("p75", 0.75))}
+    return result
+
+
+def _sparse_frame(seed):
+    frame = make_frame(2000, seed=seed).drop(columns=["contact_email"])
+    rng = np.random.default_rng(seed)
+    metric = get_benchmark_columns(frame)[1]
+    frame.loc[rng.random(len(frame)) < 0.2, metric] = np.nan
+    # One column with no values at all in one segment -> zeros
+    frame.loc[frame["segment"] == frame["segment"].iat[0], "drivers_score"] = np.nan
+    return frame
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("compact", [False, True])
+def test_grouped_benchmarks_match_row_wise(seed, compact):
+    reference = _sparse_frame(seed)
+    expected = _row_wise_benchmarks(reference)
+    frame = _normalize_frame(reference.copy()) if compact else reference
+    actual = compute_benchmarks_per_sheet(frame)
+    assert set(actual) == set(expected)
+    for segment, cols in expected.items():
+        assert list(actual[segment]) == list(cols), segment
+        for col, quartiles in cols.items():
+            assert actual[segment][col] == pytest.approx(quartiles, rel=1e-12), (segment, col)
+    assert expected[reference["segment"].iat[0]]["drivers_score"] == {"p25": 0.0, "p50": 0.0, "p75": 0.0}
+
+
+def test_empty_frame_has_no_benchmarks():
+    assert compute_benchmarks_per_sheet(make_frame(10).iloc[:0]) == {}
@@ -0,0 +1,42 @@
+"""parse_bulk_input: pasted text and uploaded CSVs with and without a header row."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import parse_bulk_input
+
+
+@pytest.mark.parametrize(
+    "csv_data",
+    [b"100001\n100002\n100003\n", b"100001\r\n100002\r\n100003", b"\xef\xbb\xbf100001\n100002\n\n100003\n"],
+)
+def test_headerless_id_list(csv_data):
+    assert parse_bulk_input(csv_data=csv_data) == ["100001", "100002", "100003"]
+
+
+@pytest.mark.parametrize("csv_data", [b"driver_id\n100001\n100002\n", b"Driver_ID\n100001\n100002\n"])
+def test_id_list_with_header(csv_data):
+    assert parse_bulk_input(csv_data=csv_data) == ["100001", "100002"]
+
+
+def test_known_column_is_picked_from_several():
+    csv_data = b"full_name;driver_id;city\nJan Nov\xc3\xa1k;100001;Praha\nEva Dvo\xc5\x99\xc3\xa1kov\xc3\xa1;100002;Brno\n"
+    assert parse_bulk_input(csv_data=csv_data) == ["100001", "100002"]
+
+
+def test_headerless_multi_column_uses_the_first_column():
+    assert parse_bulk_input(csv_data=b"100001,Jan\n100002,Eva\n") == ["100001", "100002"]
+
+
+def test_headerless_names():
+    assert parse_bulk_input(csv_data="Jan Novák\nEva Dvořáková\n".encode("utf-8")) == ["Jan Novák", "Eva Dvořáková"]
+
+
+def test_text_and_csv_are_merged_without_duplicates():
+    assert parse_bulk_input("100001, 100004;\n\n100002", b"100002\n100003\n") == ["100001", "100004", "100002", "100003"]
+
+
+def test_empty_upload():
+    assert parse_bulk_input(csv_data=b"") == []
+    assert parse_bulk_input(csv_data=b"\n\n") == []
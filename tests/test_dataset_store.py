@@ -0,0 +1,46 @@
+"""DatasetStore: the first load runs on the watcher thread, and a dropped store takes its watcher with it."""
+
+from __future__ import annotations
+
+import gc
+
+import pytest
+
+import app
+from synthetic import write_workbook
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.delenv("SCORECARD_SOURCES", raising=False)
+    monkeypatch.setattr(app, "EXCEL_PATH", write_workbook(tmp_path / "Priority Booking 02-26 results.xlsx", 300))
+    monkeypatch.setattr(app, "SNAPSHOT_DIR", tmp_path / "cache")
+    monkeypatch.setattr(app, "HISTORY_DIR", tmp_path / "cache" / "history")
+
+
+def test_first_load_runs_in_the_background(source):
+    store = app.DatasetStore(watch_interval=60)
+    store.start_watcher(load_now=True)
+    assert store.wait_loaded(60)
+    assert not store.loading
+    ds, error = store.get()
+    assert ds is not None and error is None and len(ds.frame) == 300
+    store.stop_watcher()
+    store._watcher.join(5)
+    assert not store._watcher.is_alive()
+
+
+def test_dropped_store_stops_its_watcher(source):
+    store = app.DatasetStore(watch_interval=0.05)
+    store.start_watcher(load_now=True)
+    assert store.wait_loaded(60)
+    watcher = store._watcher
+    del store
+    gc.collect()
+    watcher.join(5)
+    assert not watcher.is_alive()
+
+
+def test_get_loads_synchronously_without_a_watcher(source):
+    ds, error = app.DatasetStore().get()
+    assert ds is not None and error is None
@@ -0,0 +1,61 @@
+"""DriverIndex gives every row the segment total, rank, "better than X %" and tier the scorecard header used to
+compute with a segment scan and get_eligibility."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app import DriverIndex, driver_key, get_eligibility
+
+# Segment A: 10 couriers, ranks 1..10; segment B: 3 couriers, one with no rank; D1 is in both
+FRAME = pd.DataFrame(
+    {
+        "driver_id": [f"D{r}" for r in range(1, 11)] + ["D1", "B2", "B3"],
+        "full_name": [f"Kurýr {r}" for r in range(1, 14)],
+        "working_city": ["Praha"] * 13,
+        "segment": ["A"] * 10 + ["B"] * 3,
+        "rank": list(range(1, 11)) + [1, 2, None],
+    }
+)
+
+
+@pytest.fixture(scope="module")
+def drivers():
+    return DriverIndex(FRAME)
+
+
+def test_sizes_and_key_positions(drivers):
+    assert drivers.segment_sizes == {"A": 10, "B": 3}
+    assert drivers.totals.tolist() == [10] * 10 + [3] * 3
+    assert drivers.positions[driver_key("D1", "A")] == 0
+    assert drivers.positions[driver_key("D1", "B")] == 10
+    assert driver_key("D1", "C") not in drivers.positions
+    assert drivers.labels[10] == "Kurýr 11 | D1 | Praha | B"
+
+
+@pytest.mark.parametrize(
+    "pos, tier",
+    [(0, "top20"), (1, "top20"), (2, "top50"), (4, "top50"), (5, "bottom"), (9, "bottom"), (10, "top50")],
+)
+def test_tier_boundaries(drivers, pos, tier):
+    assert drivers.eligibility(pos) == get_eligibility(int(FRAME["rank"].iat[pos]), drivers.totals[pos])
+    assert drivers.eligibility(pos)[0] == tier
+
+
+def test_pct_better_and_missing_rank(drivers):
+    assert drivers.ranks.tolist() == list(range(1, 11)) + [1, 2, 0]
+    assert drivers.pct_better[:12].tolist() == [90, 80, 70, 60, 50, 40, 30, 20, 10, 0, 67, 33]
+
+
+def test_matches_segment_scan_on_workbook(workbook):
+    _, ds = workbook
+    frame = ds.frame
+    for pos in range(0, len(frame), 7):
+        segment, rank = frame["segment"].iat[pos], int(frame["rank"].iat[pos])
+        total = int((frame["segment"] == segment).sum())
+        assert ds.drivers.totals[pos] == total
+        assert ds.drivers.ranks[pos] == rank
+        assert ds.drivers.pct_better[pos] == round((total - rank) / total * 100)
+        assert ds.drivers.eligibility(pos) == get_eligibility(rank, total)
+        assert ds.drivers.positions[ds.drivers.keys[pos]] == pos
@@ -0,0 +1,21 @@
+"""Batch export writes one standalone scorecard per courier with the workbook values."""
+
+from __future__ import annotations
+
+import re
+
+from export_scorecards import export_chunk, export_filename
+
+
+def test_exported_scorecards_show_the_workbook_score(workbook, tmp_path):
+    reference, ds = workbook
+    expected = dict(zip(reference["driver_id"].astype(str), reference["drivers_score"]))
+    positions = list(range(0, len(ds.frame), 50))
+    assert export_chunk(positions, tmp_path, pdf=False, ds=ds) == (len(positions), 0)
+    for pos in positions:
+        driver_id = str(ds.frame["driver_id"].iat[pos])
+        html = (tmp_path / f"{export_filename(driver_id, ds.frame['segment'].iat[pos])}.html").read_text(encoding="utf-8")
+        score = re.search(r"Celkové hodnocení kurýra: ([^<]*)<", html).group(1)
+        assert score == str(expected[driver_id])
+        assert f"ID: {driver_id}<" in html
+    assert export_chunk(positions, tmp_path, pdf=False, ds=ds) == (0, len(positions))
@@ -0,0 +1,30 @@
+"""InsightTable on the compacted frame gives the same strengths / focus / at-median metrics as get_insights on the
+original float64 frame."""
+
+from __future__ import annotations
+
+import pytest
+
+from app import InsightTable, _normalize_frame, compute_benchmarks_per_sheet, get_insights, get_metric_columns_in_df
+from synthetic import make_frame
+
+
+def _names(items):
+    return [name for name, _, _ in items]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_insight_table_matches_get_insights(seed):
+    reference = make_frame(3000, seed=seed).drop(columns=["contact_email"])
+    frame = _normalize_frame(reference.copy())
+    metric_cols = get_metric_columns_in_df(frame)
+    reference_benchmarks = compute_benchmarks_per_sheet(reference)
+    table = InsightTable(frame, compute_benchmarks_per_sheet(frame), metric_cols)
+    for pos in range(len(reference)):
+        expected = get_insights(reference.iloc[pos], reference_benchmarks[reference["segment"].iat[pos]], metric_cols)
+        actual = table.insights_at(pos)
+        assert [_names(x) for x in actual] == [_names(x) for x in expected], pos
+        for got, want in zip(actual, expected):
+            for (_, v, d), (_, v_ref, d_ref) in zip(got, want):
+                assert v == pytest.approx(v_ref)
+                assert d["delta_to_median"] == pytest.approx(d_ref["delta_to_median"], abs=1e-9)
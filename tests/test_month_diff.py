@@ -0,0 +1,77 @@
+"""MonthDiff between two hand-made months: new, dropped and moved couriers, tier moves and the movers lists."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app import MonthDiff, driver_key
+
+METRIC = "Kvalita doručení"
+
+
+def _month(segments):
+    """{segment: driver_ids best first} -> frame with rank, drivers_score = 11 - rank and METRIC = rank / 10."""
+    rows = [(did, seg, r) for seg, ids in segments.items() for r, did in enumerate(ids, start=1)]
+    frame = pd.DataFrame(rows, columns=["driver_id", "segment", "rank"])
+    frame["drivers_score"] = 11.0 - frame["rank"]
+    frame[METRIC] = frame["rank"] / 10
+    return frame
+
+
+# Segment A: D10 drops out, N1 arrives, D6 climbs from 6th to 1st, D1 falls from 1st to 6th.
+# D1 also leaves segment B, where X1 arrives.
+OLD = _month({"A": [f"D{i}" for i in range(1, 11)], "B": ["D1", "B2"]})
+NEW = _month({"A": ["D6", "D2", "D3", "D4", "D5", "D1", "D7", "D8", "N1", "D9"], "B": ["B2", "X1"]})
+
+
+@pytest.fixture(scope="module")
+def diff():
+    return MonthDiff(OLD, NEW, [METRIC])
+
+
+def _row(diff, driver_id, segment):
+    rows = diff.frame[diff.frame["driver_key"] == driver_key(driver_id, segment)]
+    assert len(rows) == 1
+    return rows.iloc[0]
+
+
+def test_new_and_dropped_couriers(diff):
+    assert diff.counts("A") == {"up": 1, "down": 1, "new": 1, "left": 1}
+    assert diff.counts() == {"up": 2, "down": 1, "new": 2, "left": 2}
+    dropped, arrived = _row(diff, "D10", "A"), _row(diff, "N1", "A")
+    assert (dropped["status"], dropped["rank_old"], dropped["tier_new"]) == ("left", 10, "")
+    assert pd.isna(dropped["rank_new"]) and pd.isna(dropped["rank_change"]) and pd.isna(dropped["tier_move"])
+    assert (arrived["status"], arrived["rank_new"], arrived["tier_old"]) == ("new", 9, "")
+    assert pd.isna(arrived["rank_old"]) and pd.isna(arrived["score_change"])
+    # A courier is keyed per segment: leaving B is independent of staying in A
+    assert _row(diff, "D1", "B")["status"] == "left"
+    assert _row(diff, "D1", "A")["status"] == "both"
+
+
+def test_moved_couriers(diff):
+    up, down = _row(diff, "D6", "A"), _row(diff, "D1", "A")
+    assert (up["rank_change"], up["score_change"], up["tier_old"], up["tier_new"], up["tier_move"]) == (
+        5, 5.0, "bottom", "top20", 2
+    )
+    assert (down["rank_change"], down["score_change"], down["tier_old"], down["tier_new"], down["tier_move"]) == (
+        -5, -5.0, "top20", "bottom", -2
+    )
+    assert up[f"Δ {METRIC}"] == pytest.approx(-0.5)
+    # B2 moves from 2nd to 1st of 2: bottom -> top50
+    assert _row(diff, "B2", "B")["tier_move"] == 1
+    assert _row(diff, "D2", "A")["tier_move"] == 0
+
+
+def test_movers_and_tier_changes(diff):
+    gains, drops = diff.movers("A", n=3)
+    assert gains["driver_id"].tolist() == ["D6"]
+    assert drops["driver_id"].tolist() == ["D1", "D9"]
+    gains, _ = diff.movers(n=3)
+    assert gains["driver_id"].tolist() == ["D6", "B2"]
+    assert all(part.empty for part in diff.movers("C"))
+    assert diff.tier_changes("A")["driver_id"].tolist() == ["D1", "D6"]
+    transitions = diff.transitions("A")
+    assert transitions.loc["top20", "bottom"] == 1
+    assert transitions.loc["bottom", "top20"] == 1
+    assert transitions.loc["", "bottom"] == 1
@@ -0,0 +1,86 @@
+"""RemoteWorkbook against a local HTTP server: 200 with ETag, 304, and failures that keep the stored copy."""
+
+from __future__ import annotations
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import XLSX_MAGIC, RemoteWorkbook
+
+WORKBOOK = XLSX_MAGIC + b"\x00" * 200
+SIGN_IN_PAGE = b"<!DOCTYPE html><html><head><title>Sign in</title></head><body>" + b"x" * 2000 + b"</body></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        status, body, etag = server.response
+        if status == 200 and etag and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.requests = []
+    httpd.response = (200, WORKBOOK, '"v1"')
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def remote(server, tmp_path):
+    return RemoteWorkbook(f"http://127.0.0.1:{server.server_port}/book.xlsx", tmp_path, max_age=0, retry_after=60)
+
+
+def test_200_is_stored_with_etag(server, remote):
+    data, hint = remote.fetch()
+    assert data == WORKBOOK and hint is None
+    assert remote.body_path.read_bytes() == WORKBOOK
+    assert remote._read_meta()["etag"] == '"v1"'
+
+
+def test_304_reuses_the_stored_copy(server, remote):
+    remote.fetch()
+    fetched_at = remote._read_meta()["fetched_at"]
+    data, hint = remote.fetch()
+    assert data == WORKBOOK and hint is None
+    assert server.requests[-1]["If-None-Match"] == '"v1"'
+    assert remote._read_meta()["fetched_at"] >= fetched_at
+
+
+@pytest.mark.parametrize("response", [(500, b"boom", None), (200, SIGN_IN_PAGE, '"v2"')])
+def test_failure_keeps_serving_the_stale_copy(server, remote, response):
+    remote.fetch()
+    server.response = response
+    data, hint = remote.fetch()
+    assert data == WORKBOOK and hint is None
+    assert remote.body_path.read_bytes() == WORKBOOK
+    assert remote._read_meta()["etag"] == '"v1"'
+    # The failed attempt is recorded, so the next reruns do not hit the remote again right away
+    assert remote.is_fresh()
+    requests = len(server.requests)
+    assert remote.get() == (WORKBOOK, None)
+    assert len(server.requests) == requests
+
+
+def test_html_without_a_stored_copy_is_an_error(server, remote):
+    server.response = (200, SIGN_IN_PAGE, None)
+    data, hint = remote.fetch()
+    assert data is None and hint
+    assert not remote.body_path.exists()
@@ -0,0 +1,66 @@
+"""ScoreModel.simulate on a segment where drivers_score is linear in two metrics: the fit recovers it, the predicted
+score and rank move monotonically with a metric, and extreme edits stay within ranks 1..segment size."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import DriverIndex, ScoreModel, SegmentLadder, get_eligibility
+
+QUALITY, DELAY = "Kvalita doručení", "Zpoždění v jízdě"
+
+
+@pytest.fixture(scope="module")
+def setup():
+    rng = np.random.default_rng(0)
+    n = 200
+    frame = pd.DataFrame({"segment": ["A"] * n + ["tiny"] * 3, QUALITY: rng.uniform(0, 1, n + 3)})
+    frame[DELAY] = rng.uniform(0, 1, n + 3)
+    frame["drivers_score"] = 1 + 2 * frame[QUALITY] - 3 * frame[DELAY] + rng.normal(0, 0.01, n + 3)
+    frame["rank"] = frame.groupby("segment")["drivers_score"].rank(ascending=False, method="min").astype(int)
+    drivers = DriverIndex(frame)
+    ladder = SegmentLadder(frame, [QUALITY, DELAY])
+    return frame, ScoreModel(frame, drivers, ladder, [QUALITY, DELAY])
+
+
+def test_fit_recovers_the_linear_score(setup):
+    _, model = setup
+    fit = model.fit("A")
+    assert fit.coef == pytest.approx([2.0, -3.0], abs=0.05)
+    assert fit.r2 > 0.99
+    assert model.fit("tiny") is None
+    assert model.simulate(200, "tiny", {QUALITY: 1.0}) is None
+
+
+def test_no_change_keeps_score_and_rank(setup):
+    frame, model = setup
+    w = model.simulate(0, "A", {})
+    assert (w.score, w.predicted_score, w.rank, w.new_rank) == pytest.approx(
+        (frame["drivers_score"].iat[0], frame["drivers_score"].iat[0], frame["rank"].iat[0], frame["rank"].iat[0])
+    )
+    assert model.simulate(0, "A", {QUALITY: float("nan")}).new_rank == w.rank
+
+
+@pytest.mark.parametrize("pos", [0, 57, 123])
+def test_better_metric_never_hurts(setup, pos):
+    _, model = setup
+    quality = [model.simulate(pos, "A", {QUALITY: v}) for v in np.linspace(0, 1, 21)]
+    delay = [model.simulate(pos, "A", {DELAY: v}) for v in np.linspace(0, 1, 21)]
+    assert all(a.predicted_score <= b.predicted_score for a, b in zip(quality, quality[1:]))
+    assert all(a.new_rank >= b.new_rank for a, b in zip(quality, quality[1:]))
+    assert all(a.predicted_score >= b.predicted_score for a, b in zip(delay, delay[1:]))
+    assert all(a.new_rank <= b.new_rank for a, b in zip(delay, delay[1:]))
+    for w in quality + delay:
+        assert (w.tier, w.label) == get_eligibility(w.new_rank, w.total)
+
+
+@pytest.mark.parametrize("pos", [0, 57, 123])
+def test_extreme_edits_clamp_to_the_segment(setup, pos):
+    _, model = setup
+    best = model.simulate(pos, "A", {QUALITY: 100.0, DELAY: -100.0})
+    worst = model.simulate(pos, "A", {QUALITY: -100.0, DELAY: 100.0})
+    assert (best.new_rank, best.tier) == (1, "top20")
+    assert (worst.new_rank, worst.tier) == (200, "bottom")
+    assert best.total == worst.total == 200
@@ -0,0 +1,13 @@
+"""The scorecard header shows drivers_score exactly as the workbook has it."""
+
+from __future__ import annotations
+
+from app import scorecard_html
+
+
+def test_header_shows_the_workbook_score(workbook):
+    reference, ds = workbook
+    expected = dict(zip(reference["driver_id"].astype(str), reference["drivers_score"]))
+    for pos in range(0, len(ds.frame), 37):
+        score = expected[str(ds.frame["driver_id"].iat[pos])]
+        assert f"Celkové hodnocení kurýra: {score}<" in scorecard_html(ds, pos)
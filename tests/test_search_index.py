@@ -0,0 +1,79 @@
+"""SearchIndex lookups on a small hand-made frame: word prefixes, exact driver_id, the search_drivers wrapper,
+diacritic folding and the typo-tolerant fuzzy() fallback."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app import SearchIndex, search_drivers
+
+FRAME = pd.DataFrame(
+    {
+        "driver_id": ["D100", "D101", "D102", "D100", "X7", "D200", "D201"],
+        "full_name": [
+            "Jan Novák",
+            "Jana Nováková",
+            "Petr Dvořák",
+            "Jan Novák",
+            "Novotný Jan",
+            "Tomáš Procházka",
+            "Lucie Procházková",
+        ],
+        "segment": ["OOH", "OOH", "Home", "Home", "OOH", "Home", "OOH"],
+    }
+)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex(FRAME)
+
+
+def test_prefix_every_word_starts_a_name_word(index):
+    assert index.prefix("nov j").tolist() == [0, 1, 3, 4]
+    assert index.prefix("NOVÁKOVÁ").tolist() == [1]
+    assert index.prefix("jan nova").tolist() == [0, 1, 3]
+    assert index.prefix("ák").tolist() == []
+    assert index.prefix("  ").tolist() == []
+
+
+def test_search_adds_prefix_hits_for_several_words(index):
+    assert index.search("dvo p").tolist() == [2]
+    assert index.search("novak jan").tolist() == [0, 1, 3]
+    assert index.search("x7").tolist() == [4]
+
+
+def test_exact_id_returns_every_segment(index):
+    assert index.exact_id("d100").tolist() == [0, 3]
+    assert index.exact_id(" D102 ").tolist() == [2]
+    assert index.exact_id("D10").tolist() == []
+
+
+def test_search_drivers_requires_the_index(index):
+    assert search_drivers(FRAME, "dvořák", index)["driver_id"].tolist() == ["D102"]
+    with pytest.raises(ValueError):
+        search_drivers(FRAME, "novak", None)
+    with pytest.raises(ValueError):
+        search_drivers(FRAME.iloc[:2], "novak", index)
+
+
+@pytest.mark.parametrize("query", ["novak", "NOVÁK", "Novák", "  novák  "])
+def test_search_folds_case_and_diacritics(index, query):
+    assert index.search(query).tolist() == [0, 1, 3]
+
+
+def test_fuzzy_finds_swapped_and_missing_letters(index):
+    assert index.search("prohcazka").tolist() == []
+    # Swapped letters: the exact surname first, the longer surname it prefixes after it
+    assert index.fuzzy("prohcazka").tolist() == [5, 6]
+    assert index.fuzzy("tomas prchazka").tolist() == [5]
+    assert index.fuzzy("petr dvorka").tolist() == [2]
+    assert index.fuzzy("zzzz").tolist() == []
+
+
+def test_fuzzy_ranks_exact_hits_first_and_keeps_k(index):
+    assert index.fuzzy("jana").tolist() == [1, 0, 3, 4]
+    assert index.fuzzy("novka").tolist() == [0, 3, 1]
+    assert index.fuzzy("novka", k=2).tolist() == [0, 3]
+    assert index.fuzzy("novak", k=2).tolist() == [0, 1]
@@ -0,0 +1,74 @@
+"""SegmentLadder.tier_gaps at the Top 20 % / Top 50 % boundaries agrees with get_eligibility, and metric
+percentiles count ties half."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import SegmentLadder, get_eligibility
+
+# Ten couriers in segment A: rank r has drivers_score 11 - r
+FRAME = pd.DataFrame(
+    {
+        "segment": ["A"] * 10,
+        "rank": range(1, 11),
+        "drivers_score": [float(11 - r) for r in range(1, 11)],
+        "late_pct": [1.0, 2.0, 2.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, np.nan],
+    }
+)
+
+
+@pytest.fixture(scope="module")
+def ladder():
+    return SegmentLadder(FRAME, ["late_pct"])
+
+
+def _gaps(ladder, rank, total=10):
+    return {g.tier: g for g in ladder.tier_gaps("A", rank, 11.0 - rank, total)}
+
+
+@pytest.mark.parametrize(
+    "rank, top20, top50",
+    [
+        (1, (True, 0.0, 0), (True, 0.0, 0)),
+        (2, (True, 0.0, 0), (True, 0.0, 0)),
+        (3, (False, 1.0, 1), (True, 0.0, 0)),
+        (5, (False, 3.0, 3), (True, 0.0, 0)),
+        (6, (False, 4.0, 4), (False, 1.0, 1)),
+        (10, (False, 8.0, 8), (False, 5.0, 5)),
+    ],
+)
+def test_gaps_around_the_cut_offs(ladder, rank, top20, top50):
+    gaps = _gaps(ladder, rank)
+    assert (gaps["top20"].threshold_rank, gaps["top20"].threshold_score) == (2, 9.0)
+    assert (gaps["top50"].threshold_rank, gaps["top50"].threshold_score) == (5, 6.0)
+    for tier, (reached, gap, overtake) in (("top20", top20), ("top50", top50)):
+        assert (gaps[tier].reached, gaps[tier].score_gap, gaps[tier].overtake) == (reached, gap, overtake), tier
+
+
+@pytest.mark.parametrize("total", range(1, 26))
+def test_reached_matches_get_eligibility(ladder, total):
+    for rank in range(1, total + 1):
+        gaps = {g.tier: g for g in ladder.tier_gaps("A", rank, None, total)}
+        tier, _ = get_eligibility(rank, total)
+        assert gaps["top20"].reached == (tier == "top20"), (rank, total)
+        assert gaps["top50"].reached == (tier in ("top20", "top50")), (rank, total)
+        # The threshold rank is the last rank still inside the tier
+        assert gaps["top20"].reached == (rank <= gaps["top20"].threshold_rank), (rank, total)
+        assert gaps["top50"].reached == (rank <= gaps["top50"].threshold_rank), (rank, total)
+
+
+def test_unknown_segment_and_missing_score(ladder):
+    for gap in ladder.tier_gaps("B", 1, 5.0, 0):
+        assert (gap.reached, gap.threshold_rank, gap.threshold_score, gap.score_gap) == (False, 0, None, None)
+    assert all(g.score_gap is None for g in ladder.tier_gaps("A", 3, float("nan"), 10))
+
+
+def test_percentile_counts_ties_half(ladder):
+    assert ladder.percentile("A", "late_pct", 2.0) == pytest.approx((1 + 1.5) / 9 * 100)
+    assert ladder.percentile("A", "late_pct", 0.5) == 0.0
+    assert ladder.percentile("A", "late_pct", 9.0) == 100.0
+    assert ladder.percentile("A", "late_pct", float("nan")) is None
+    assert ladder.percentile("B", "late_pct", 2.0) is None